@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark for IMDB title page extraction
+Compares full-tree parsing with the targeted extraction used by IMDBScraper
+
+Usage: python benchmarks/bench_page_parse.py [pages_dir] [repeats]
+"""
+
+import os
+import sys
+import time
+
+# Add src directory to path
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, src_path)
+
+from page_parser import parse_html, parse_json_ld, parse_movie_page
+
+
+def time_per_page(func, content, url, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func(content, url)
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    pages_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"{'page':<32} {'path':<10} {'full tree':>11} {'targeted':>11} {'speedup':>8}")
+    print("-" * 76)
+    for name in sorted(os.listdir(pages_dir)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(pages_dir, name), 'rb') as f:
+            content = f.read()
+        url = f"https://www.imdb.com/title/{name.split('_')[0].replace('.html', '')}/"
+
+        full_time, full_result = time_per_page(lambda c, u: parse_html(c, u, targeted=False), content, url, repeats)
+        fast_time, fast_result = time_per_page(parse_movie_page, content, url, repeats)
+        path = 'json-ld' if parse_json_ld(content, url) else 'fragments'
+
+        if path == 'fragments' and fast_result != full_result:
+            print(f"   ❌ {name}: targeted extraction differs from full-tree parse")
+        print(f"{name:<32} {path:<10} {full_time * 1000:>9.2f}ms {fast_time * 1000:>9.3f}ms {full_time / fast_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Approximate Nearest-Neighbour Module
+Inverted-file (IVF) cosine index for similar-title queries on TF-IDF vectors
+"""
+
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from ranking import top_k_indices
+
+
+class IVFIndex:
+    """Pure NumPy/SciPy inverted-file index over L2-normalised rows
+
+    Items are clustered with spherical k-means into ``n_lists`` inverted
+    lists. A query scores the centroids, visits the ``n_probe`` closest lists
+    and ranks only their members exactly. ``n_probe`` is the recall/latency
+    knob: visiting every list gives the exact answer.
+    """
+
+    # Attributes persisted by model_store
+    _param_names = ('n_lists', 'n_probe', 'n_iter', 'block_size', 'random_state')
+    _array_attributes = ('centroids', 'list_offsets', 'list_items', 'item_lists')
+    _sparse_attributes = ('vectors', 'sorted_vectors')
+
+    def __init__(self, n_lists=None, n_probe=4, n_iter=10, block_size=4096, random_state=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.block_size = block_size
+        self.random_state = random_state
+        self.centroids = None
+        self.list_offsets = None
+        self.list_items = None
+        self.item_lists = None
+        self.sorted_vectors = None
+        self.vectors = None
+
+    @staticmethod
+    def _normalized(features):
+        """Get the L2-normalised rows of a dense or sparse feature matrix as float32 CSR"""
+        if sparse.issparse(features):
+            vectors = features.tocsr().astype(np.float32)
+        else:
+            vectors = sparse.csr_matrix(np.asarray(features, dtype=np.float32))
+        return normalize(vectors)
+
+    def build(self, features):
+        """Cluster the feature matrix and build the inverted lists"""
+        vectors = self._normalized(features)
+        n_items = vectors.shape[0]
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_items)))
+        n_lists = min(n_lists, max(n_items, 1))
+        rng = np.random.default_rng(self.random_state)
+
+        centroids = vectors[rng.choice(n_items, n_lists, replace=False)].toarray()
+        assignments = np.zeros(n_items, dtype=np.int32)
+        for _ in range(self.n_iter):
+            assignments = self._assign(vectors, centroids)
+            membership = sparse.csr_matrix(
+                (np.ones(n_items, dtype=np.float32), (assignments, np.arange(n_items))),
+                shape=(n_lists, n_items)
+            )
+            centroids = np.asarray((membership @ vectors).todense())
+
+            # Reseed empty lists with random items so every list stays usable
+            empty = np.flatnonzero(np.asarray(membership.sum(axis=1)).ravel() == 0)
+            if len(empty) > 0:
+                centroids[empty] = vectors[rng.choice(n_items, len(empty), replace=False)].toarray()
+            centroids = normalize(centroids)
+
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._set_lists(vectors, self._assign(vectors, centroids))
+        return self
+
+    def _set_lists(self, vectors, assignments):
+        """Lay out the inverted lists for the given list assignment of every item"""
+        self.item_lists = assignments
+        self.list_items = np.argsort(assignments, kind='stable').astype(np.int32)
+        self.list_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(assignments, minlength=len(self.centroids))))
+        ).astype(np.int64)
+        self.sorted_vectors = vectors[self.list_items]
+        self.vectors = vectors
+
+    def update(self, features, changed_rows):
+        """
+        Add new items and re-file changed ones without re-clustering
+
+        Rows of features beyond the indexed items are new. New and changed
+        items are assigned to their closest existing centroid; rebuild the
+        index from time to time so the centroids follow the data.
+
+        Args:
+            features: Feature matrix of all items, indexed ones first
+            changed_rows: Positions of indexed items whose features changed
+
+        Returns:
+            self
+        """
+        if self.centroids is None:
+            raise ValueError("Index not built. Call build() first.")
+        vectors = self._normalized(features)
+        n_indexed = len(self.item_lists)
+        changed = np.union1d(np.asarray(changed_rows, dtype=np.int64), np.arange(n_indexed, vectors.shape[0]))
+
+        assignments = np.empty(vectors.shape[0], dtype=np.int32)
+        assignments[:n_indexed] = self.item_lists
+        assignments[changed] = self._assign(vectors[changed], self.centroids)
+        self._set_lists(vectors, assignments)
+        return self
+
+    def _assign(self, vectors, centroids):
+        """Assign every row to its most similar centroid, in row blocks"""
+        assignments = np.empty(vectors.shape[0], dtype=np.int32)
+        centroids_t = np.ascontiguousarray(centroids.T)
+        for start in range(0, vectors.shape[0], self.block_size):
+            stop = min(start + self.block_size, vectors.shape[0])
+            assignments[start:stop] = np.argmax(vectors[start:stop] @ centroids_t, axis=1)
+        return assignments
+
+    def query_vector(self, vector, top_n=5, n_probe=None, exclude=None):
+        """Get (indices, scores) of the items most similar to a feature vector"""
+        if self.centroids is None:
+            raise ValueError("Index not built. Call build() first.")
+        vector = normalize(sparse.csr_matrix(vector, dtype=np.float32))
+        return self._search(vector.indices, vector.data, top_n, n_probe, exclude)
+
+    def _search(self, term_ids, weights, top_n, n_probe, exclude):
+        """Search with a normalised query given as parallel term id/weight arrays
+
+        Works directly on the CSR buffers with NumPy so a query does not pay
+        for building scipy.sparse objects.
+        """
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids[:, term_ids] @ weights
+        probe_lists = top_k_indices(centroid_scores, n_probe)
+
+        dense_query = np.zeros(self.centroids.shape[1], dtype=np.float32)
+        dense_query[term_ids] = weights
+
+        # Members of a list are stored contiguously, so each probe is one slice
+        indptr = self.sorted_vectors.indptr
+        candidates = []
+        candidate_scores = []
+        for list_id in probe_lists:
+            start, stop = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            if stop == start:
+                continue
+            lo, hi = indptr[start], indptr[stop]
+            products = self.sorted_vectors.data[lo:hi] * dense_query[self.sorted_vectors.indices[lo:hi]]
+            sums = np.concatenate(([0], np.cumsum(products, dtype=np.float64)))
+            candidates.append(self.list_items[start:stop])
+            candidate_scores.append(sums[indptr[start + 1:stop + 1] - lo] - sums[indptr[start:stop] - lo])
+        if not candidates:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+        candidates = np.concatenate(candidates)
+        candidate_scores = np.concatenate(candidate_scores)
+
+        if exclude is not None:
+            keep = candidates != exclude
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+        top = top_k_indices(candidate_scores, top_n)
+        top = top[np.lexsort((candidates[top], -candidate_scores[top]))]
+        return candidates[top], candidate_scores[top].astype(np.float32)
+
+    def query(self, item_idx, top_n=5, n_probe=None):
+        """Get (indices, scores) of the top_n neighbours of an indexed item"""
+        if self.vectors is None:
+            raise ValueError("Index not built. Call build() first.")
+        start, stop = self.vectors.indptr[item_idx], self.vectors.indptr[item_idx + 1]
+        return self._search(
+            self.vectors.indices[start:stop], self.vectors.data[start:stop],
+            top_n, n_probe, exclude=item_idx
+        )
+
+    def evaluate_recall(self, top_n=10, sample_size=200, n_probe=None, random_state=0):
+        """Measure recall@top_n and query latency against exact cosine search
+
+        Exact neighbours are computed by brute force for a random sample of
+        indexed items only, so this stays cheap on large catalogs.
+        """
+        if self.vectors is None:
+            raise ValueError("Index not built. Call build() first.")
+        n_items = self.vectors.shape[0]
+        rng = np.random.default_rng(random_state)
+        sample = rng.choice(n_items, min(sample_size, n_items), replace=False)
+
+        hits = 0
+        expected = 0
+        query_seconds = 0.0
+        for item_idx in sample:
+            exact_scores = np.asarray(self.vectors @ self.vectors[item_idx].T.toarray()).ravel()
+            exact_scores[item_idx] = -np.inf
+            k = min(top_n, n_items - 1)
+            if k <= 0:
+                continue
+            exact = top_k_indices(exact_scores, k)
+
+            start = time.perf_counter()
+            approx, _ = self.query(item_idx, top_n, n_probe)
+            query_seconds += time.perf_counter() - start
+
+            hits += len(np.intersect1d(exact, approx))
+            expected += k
+
+        return {
+            'recall': hits / expected if expected else 1.0,
+            'n_probe': min(n_probe or self.n_probe, len(self.centroids)),
+            'n_lists': len(self.centroids),
+            'mean_query_ms': 1000 * query_seconds / max(len(sample), 1),
+            'sample_size': len(sample)
+        }
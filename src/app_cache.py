@@ -0,0 +1,60 @@
+"""
+App Cache Module
+Process-wide Streamlit caches of the catalog, the fitted recommender and widget options
+"""
+
+import streamlit as st
+
+from enhanced_data import EnhancedDataProvider
+from enhanced_recommendation import EnhancedMovieRecommender
+
+@st.cache_resource(max_entries=1, show_spinner="Loading catalog...")
+def load_data_provider(catalog_path, source_key):
+    """Load and fingerprint the catalog once per process for a given source
+
+    source_key comes from file metadata (path, size, mtime), so a rerun
+    neither reloads nor rehashes the catalog unless its file changed.
+    """
+    data_provider = EnhancedDataProvider(catalog_path)
+    return data_provider, data_provider.get_fingerprint()
+
+@st.cache_resource(max_entries=1, show_spinner="Fitting recommendation model...")
+def fit_recommender(dataset_fingerprint, _data_provider):
+    """Fit the recommender once per process for a given dataset fingerprint
+
+    Streamlit reruns the script on every widget interaction; the fitted model
+    is shared across reruns and sessions and only rebuilt when the data changes.
+    The similarity index is built on every CPU.
+    """
+    recommender = EnhancedMovieRecommender(_data_provider, n_jobs=-1)
+    recommender.fit()
+    return recommender
+
+@st.cache_resource(max_entries=1)
+def get_title_options(dataset_fingerprint, _recommender):
+    """Get the title list offered by selectboxes, built once per dataset fingerprint"""
+    return _recommender.df['title'].tolist()
+
+def get_available_genres(recommender):
+    """Get the sorted genres of the catalog from the fitted genre vocabulary"""
+    return sorted(recommender.genre_vocabulary)
+
+def load_recommendation_system(catalog_path=None):
+    """
+    Load and initialize the enhanced recommendation system
+
+    Args:
+        catalog_path: Catalog file to serve; None uses the built-in dataset
+
+    Returns:
+        Tuple of (recommender, catalog frame, data provider), or Nones on error
+    """
+    try:
+        data_provider, fingerprint = load_data_provider(
+            catalog_path, EnhancedDataProvider.get_source_key(catalog_path)
+        )
+        recommender = fit_recommender(fingerprint, data_provider)
+        return recommender, recommender.df, data_provider
+    except Exception as e:
+        st.error(f"Error loading recommendation system: {str(e)}")
+        return None, None, None
@@ -0,0 +1,175 @@
+"""
+Crawl Frontier Module
+Persistent visited-set and priority queue of IMDB titles for incremental crawls
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TITLE_ID_PATTERN = re.compile(r'(tt\d+)')
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+DROPPED = 'dropped'
+
+
+def extract_title_id(url: str) -> Optional[str]:
+    """Get the IMDB title ID (e.g. 'tt1375666') from a title URL"""
+    match = TITLE_ID_PATTERN.search(url or '')
+    return match.group(1) if match else None
+
+
+class CrawlFrontier:
+    """SQLite-backed crawl state keyed by IMDB ``tt`` ID
+
+    Every title is in one of four states: pending (queued), done (fetched at
+    ``fetched_at``), failed, or dropped (scheduled but no longer needed once
+    its crawl reached its limit). A done title is only queued again once it
+    is older than ``max_age`` seconds, so repeated runs fetch just new or
+    stale titles. Each state change is committed immediately, which makes
+    every call a checkpoint: an interrupted crawl resumes from its pending
+    titles.
+
+    Titles are queued on behalf of a crawl (start_crawl), which records the
+    crawl's keep filter, its limit on kept titles and how many it kept so
+    far, so a resumed crawl keeps exactly what the uninterrupted one would.
+    """
+
+    def __init__(self, path: str = 'imdb_frontier.sqlite', max_age: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS titles ('
+                'tt_id TEXT PRIMARY KEY, url TEXT NOT NULL, priority REAL NOT NULL, '
+                'status TEXT NOT NULL, enqueued_at REAL NOT NULL, fetched_at REAL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS titles_queue ON titles (status, priority DESC, enqueued_at)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS crawls ('
+                'crawl_id INTEGER PRIMARY KEY AUTOINCREMENT, keep_filter TEXT NOT NULL, '
+                'max_kept INTEGER, kept INTEGER NOT NULL DEFAULT 0)'
+            )
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(titles)')}
+            if 'crawl_id' not in columns:
+                self._conn.execute('ALTER TABLE titles ADD COLUMN crawl_id INTEGER')
+
+    def start_crawl(self, keep_filter: Dict, limit: Optional[int] = None) -> int:
+        """
+        Register a crawl whose titles are queued with add(..., crawl_id=...)
+
+        Args:
+            keep_filter: JSON-serializable description of the titles to keep
+            limit: Maximum number of titles the crawl keeps
+
+        Returns:
+            The crawl ID
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(
+                'INSERT INTO crawls (keep_filter, max_kept) VALUES (?, ?)', (json.dumps(keep_filter), limit)
+            ).lastrowid
+
+    def get_crawl(self, crawl_id: Optional[int]) -> Tuple[Dict, Optional[int], int]:
+        """Get (keep_filter, limit, kept so far) of a crawl; titles without a crawl keep everything"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT keep_filter, max_kept, kept FROM crawls WHERE crawl_id = ?', (crawl_id,)
+            ).fetchone()
+        if row is None:
+            return {}, None, 0
+        return json.loads(row[0]), row[1], row[2]
+
+    def add(self, url: str, priority: float = 0.0, crawl_id: Optional[int] = None) -> bool:
+        """
+        Queue a title unless it was fetched recently
+
+        Args:
+            url: Title URL
+            priority: Higher priorities are fetched first
+            crawl_id: Crawl (from start_crawl) the title is queued for
+
+        Returns:
+            True if the title is now pending and should be fetched
+        """
+        tt_id = extract_title_id(url)
+        if tt_id is None:
+            return False
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT status, fetched_at, priority FROM titles WHERE tt_id = ?', (tt_id,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    'INSERT INTO titles (tt_id, url, priority, status, enqueued_at, crawl_id) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (tt_id, url, priority, PENDING, now, crawl_id)
+                )
+                return True
+            status, fetched_at, old_priority = row
+            if status == DONE and fetched_at is not None and now - fetched_at < self.max_age:
+                return False
+            self._conn.execute(
+                'UPDATE titles SET url = ?, priority = ?, status = ?, enqueued_at = ?, crawl_id = ? WHERE tt_id = ?',
+                (url, max(priority, old_priority), PENDING, now, crawl_id, tt_id)
+            )
+            return True
+
+    def next_batch(self, size: int = 50) -> List[Tuple[str, str, Optional[int]]]:
+        """Get up to size pending (tt_id, url, crawl_id) tuples, highest priority first"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT tt_id, url, crawl_id FROM titles WHERE status = ? '
+                'ORDER BY priority DESC, enqueued_at LIMIT ?',
+                (PENDING, size)
+            ).fetchall()
+
+    def mark_done(self, url: str, kept: bool = False):
+        """Record a successful fetch; kept counts the title towards its crawl's limit"""
+        self._set_status(url, DONE, time.time())
+        if kept:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    'UPDATE crawls SET kept = kept + 1 WHERE crawl_id = '
+                    '(SELECT crawl_id FROM titles WHERE tt_id = ?)', (extract_title_id(url),)
+                )
+
+    def mark_failed(self, url: str):
+        """Record a failed fetch; the title is retried on the next add()"""
+        self._set_status(url, FAILED, None)
+
+    def mark_dropped(self, urls: Iterable[str]):
+        """Record pending titles their crawl no longer needs; they are not resumed"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE titles SET status = ? WHERE tt_id = ? AND status = ?',
+                [(DROPPED, extract_title_id(url), PENDING) for url in urls]
+            )
+
+    def _set_status(self, url: str, status: str, fetched_at: Optional[float]):
+        tt_id = extract_title_id(url)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE titles SET status = ?, fetched_at = COALESCE(?, fetched_at) WHERE tt_id = ?',
+                (status, fetched_at, tt_id)
+            )
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM titles WHERE status = ?', (PENDING,)
+            ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -5,15 +5,21 @@ Handles data cleaning, preprocessing, and feature engineering
 
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import MultiLabelBinarizer
 import re
 import json
+import itertools
+
+from field_tokenizer import split_field, tokenize_field
 
 class MovieDataProcessor:
     def __init__(self):
-        self.genre_encoder = MultiLabelBinarizer()
         self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        self.genre_classes = np.array([], dtype=object)
+        self.genre_columns = {}
+        self.genre_index = pd.Index([], dtype=object)
+        self.is_fitted = False
         
     def load_sample_data(self):
         """Load sample movie data (in real scenario, this would be from IMDB API or database)"""
@@ -59,71 +65,153 @@ class MovieDataProcessor:
     
     def clean_genres(self, genre_string):
         """Clean and standardize genre strings"""
-        if pd.isna(genre_string):
-            return []
-        # Split by comma and clean each genre
-        genres = [genre.strip() for genre in str(genre_string).split(',')]
-        # Remove empty strings and standardize
-        genres = [genre for genre in genres if genre and genre != 'nan']
-        return genres
+        return split_field(genre_string)
     
     def clean_actors(self, actors_string):
         """Clean and standardize actor strings"""
-        if pd.isna(actors_string):
-            return []
-        # Split by comma and clean each actor name
-        actors = [actor.strip() for actor in str(actors_string).split(',')]
-        # Remove empty strings and standardize
-        actors = [actor for actor in actors if actor and actor != 'nan']
-        return actors
+        return split_field(actors_string)
     
     def clean_directors(self, director_string):
         """Clean and standardize director strings"""
-        if pd.isna(director_string):
-            return []
-        # Split by comma and clean each director name
-        directors = [director.strip() for director in str(director_string).split(',')]
-        # Remove empty strings and standardize
-        directors = [director for director in directors if director and director != 'nan']
-        return directors
+        return split_field(director_string)
     
-    def process_movie_data(self, df):
-        """Process and clean the movie dataset"""
+    def _clean_columns(self, df, genres=None):
+        """
+        Add the cleaned genre, actor and director list columns to df
+        
+        Args:
+            df: Movie frame
+            genres: The genre column already tokenized, if available
+        
+        Returns:
+            The tokenized genre field, reused to build the genre features
+        """
+        if genres is None:
+            genres = tokenize_field(df['genre'])
+        df['genres_clean'] = genres.row_lists()
+        df['actors_clean'] = tokenize_field(df['actors']).row_lists()
+        df['directors_clean'] = tokenize_field(df['director']).row_lists()
+        return genres
+    
+    def fit(self, df):
+        """
+        Fit the genre encoder and TF-IDF vectorizer on a reference corpus
+        
+        The genre classes and TF-IDF vocabulary are then frozen: transform()
+        and transform_chunks() only encode new data with them.
+        """
+        return self._fit(df, tokenize_field(df['genre'], sort=True))
+    
+    def _fit(self, df, genres):
+        """fit() with the genre column already tokenized (sorted vocabulary)"""
+        self.genre_classes = np.asarray(genres.vocabulary, dtype=object)
+        self.genre_columns = {genre: i for i, genre in enumerate(self.genre_classes)}
+        self.genre_index = pd.Index(self.genre_classes, dtype=object)
+        self.tfidf_vectorizer.fit(df['description'].fillna(''))
+        self.is_fitted = True
+        return self
+    
+    def transform(self, df):
+        """
+        Build features for a batch of movies with the fitted encoders
+        
+        Genres unknown to the fitted encoder and words outside the frozen
+        vocabulary are ignored, so the cost depends only on the batch size.
+        
+        The cleaned genre/actor/director columns are added to df itself,
+        which is returned as the processed frame without copying it.
+        
+        Returns:
+            Tuple of (processed frame, uint8 genre one-hot CSR matrix with
+            one column per genre_classes entry, TF-IDF matrix)
+        """
+        return self._transform(df)
+    
+    def _transform(self, df, genres=None):
+        """transform(), reusing the tokenized genre column when given"""
+        if not self.is_fitted:
+            raise ValueError("Processor not fitted. Call fit() first.")
+        
         # Clean genres, actors, and directors
-        df['genres_clean'] = df['genre'].apply(self.clean_genres)
-        df['actors_clean'] = df['actors'].apply(self.clean_actors)
-        df['directors_clean'] = df['director'].apply(self.clean_directors)
-        
-        # Create genre features
-        genre_matrix = self.genre_encoder.fit_transform(df['genres_clean'])
-        genre_features = pd.DataFrame(
-            genre_matrix, 
-            columns=self.genre_encoder.classes_,
-            index=df.index
-        )
+        genres = self._clean_columns(df, genres)
+        
+        # Create genre features, kept sparse and apart from the row metadata;
+        # genres unknown to the fitted classes are dropped
+        genre_features = genres.to_csr(np.uint8, columns=self.genre_columns)
         
         # Create text features from description
-        text_features = self.tfidf_vectorizer.fit_transform(df['description'].fillna(''))
+        text_features = self.tfidf_vectorizer.transform(df['description'].fillna(''))
+        
+        return df, genre_features, text_features
+    
+    def transform_chunks(self, data, chunksize=10_000):
+        """
+        Stream features for new movies chunk by chunk
+        
+        Args:
+            data: DataFrame, or an iterable of DataFrames such as
+                pd.read_csv(..., chunksize=...)
+            chunksize: rows per chunk when data is a single DataFrame
         
-        # Combine all features
-        df_processed = df.copy()
-        df_processed = pd.concat([df_processed, genre_features], axis=1)
+        Yields:
+            transform() results, one tuple per chunk
+        """
+        if isinstance(data, pd.DataFrame):
+            chunks = (data.iloc[start:start + chunksize].copy() for start in range(0, len(data), chunksize))
+        else:
+            chunks = data
+        for chunk in chunks:
+            yield self.transform(chunk)
+    
+    def process_movie_data(self, df):
+        """Process and clean the movie dataset, fitting the encoders on it
         
-        return df_processed, genre_features, text_features
+        Same as fit(df).transform(df), but the genre column is tokenized once.
+        """
+        genres = tokenize_field(df['genre'], sort=True)
+        return self._fit(df, genres)._transform(df, genres)
     
     def create_user_preference_vector(self, preferred_genres, preferred_actors, preferred_directors):
         """Create a user preference vector for recommendation"""
         # Initialize preference vector
-        preference_vector = np.zeros(len(self.genre_encoder.classes_))
+        preference_vector = np.zeros(len(self.genre_classes))
         
         # Set preferred genres to 1
         for genre in preferred_genres:
-            if genre in self.genre_encoder.classes_:
-                genre_idx = list(self.genre_encoder.classes_).index(genre)
+            genre_idx = self.genre_columns.get(genre)
+            if genre_idx is not None:
                 preference_vector[genre_idx] = 1
         
         return preference_vector
     
+    def create_user_preference_matrix(self, preferred_genres_per_user):
+        """
+        Encode many users' preferred genres in one pass
+        
+        Args:
+            preferred_genres_per_user: one list of preferred genres per user
+        
+        Returns:
+            Binary (users x genres) CSR matrix; row i equals
+            create_user_preference_vector for user i
+        """
+        n_users = len(preferred_genres_per_user)
+        lengths = np.fromiter(map(len, preferred_genres_per_user), dtype=np.int64, count=n_users)
+        # All users' genres are looked up at once in the cached genre index
+        genre_ids = self.genre_index.get_indexer(
+            pd.Index(list(itertools.chain.from_iterable(preferred_genres_per_user)), dtype=object)
+        )
+        row_ids = np.repeat(np.arange(n_users), lengths)
+        known = genre_ids >= 0
+        matrix = sparse.csr_matrix(
+            (np.ones(int(known.sum())), (row_ids[known], genre_ids[known])),
+            shape=(n_users, len(self.genre_classes))
+        )
+        # A genre listed twice by a user still counts once
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+    
     def calculate_similarity(self, user_preferences, movie_features):
         """Calculate similarity between user preferences and movie features"""
         # Cosine similarity between user preferences and movie genre features
@@ -132,8 +220,37 @@ class MovieDataProcessor:
         )
         return similarity
     
+    def calculate_similarities(self, user_preferences, feature_matrix, feature_norms=None):
+        """Calculate similarity between user preferences and every row of a feature matrix
+        
+        Vectorized form of calculate_similarity: one matrix-vector product
+        instead of a per-movie loop. The feature matrix may be dense or
+        sparse. Pass precomputed row norms to avoid recomputing them on
+        every request.
+        """
+        if feature_norms is None:
+            feature_norms = self.get_row_norms(feature_matrix)
+        similarities = feature_matrix @ user_preferences / (
+            np.linalg.norm(user_preferences) * feature_norms + 1e-8
+        )
+        return similarities
+    
+    def get_feature_array(self, genre_features):
+        """Get genre features as a float CSR matrix for vectorized scoring"""
+        return sparse.csr_matrix(genre_features, dtype=np.float64)
+    
+    def get_row_norms(self, feature_matrix):
+        """Get the L2 norm of every row of a dense or sparse feature matrix"""
+        if sparse.issparse(feature_matrix):
+            return np.sqrt(np.asarray(feature_matrix.multiply(feature_matrix).sum(axis=1)).ravel())
+        return np.linalg.norm(feature_matrix, axis=1)
+    
     def get_movie_features(self, df_processed, movie_id):
         """Get feature vector for a specific movie"""
         movie_row = df_processed.iloc[movie_id]
-        genre_features = movie_row[self.genre_encoder.classes_].values
+        genre_features = np.zeros(len(self.genre_classes), dtype=np.int64)
+        for genre in movie_row['genres_clean']:
+            genre_idx = self.genre_columns.get(genre)
+            if genre_idx is not None:
+                genre_features[genre_idx] = 1
         return genre_features
@@ -3,12 +3,51 @@ Enhanced Movie and Web Series Data with Posters and Language Support
 Includes movies, web series, posters, and multiple languages (Hindi, English, Hindi Dubbed)
 """
 
+import hashlib
+import os
+
 import pandas as pd
 import numpy as np
 
+from catalog_loader import load_catalog, to_categorical
+
 class EnhancedDataProvider:
-    def __init__(self):
-        self.movies_data = self._create_enhanced_dataset()
+    def __init__(self, catalog_path=None, chunksize=100_000):
+        """
+        Args:
+            catalog_path: Optional CSV/JSON/JSONL/Parquet catalog file (for
+                example IMDBScraper output); the built-in dataset is used
+                when omitted
+            chunksize: Rows processed per chunk when loading catalog_path
+        """
+        self.field_encodings = {}
+        self.load_stats = {}
+        if catalog_path is None:
+            self.movies_data = to_categorical(self._create_enhanced_dataset())
+        else:
+            self.movies_data, self.field_encodings, self.load_stats = load_catalog(catalog_path, chunksize)
+        self._fingerprint = self._compute_fingerprint()
+    
+    @staticmethod
+    def get_source_key(catalog_path=None):
+        """
+        Identify a catalog source from file metadata without reading it
+        
+        Returns:
+            (absolute path, size, mtime) of catalog_path, or None for the
+            built-in dataset; usable as a cache key for loaded providers
+        """
+        if catalog_path is None:
+            return None
+        stat = os.stat(catalog_path)
+        return os.path.abspath(catalog_path), stat.st_size, stat.st_mtime_ns
+    
+    def _compute_fingerprint(self):
+        """Hash the catalog contents; computed before any consumer adds derived columns"""
+        hashed = pd.util.hash_pandas_object(self.movies_data, index=False)
+        digest = hashlib.sha1(hashed.values.tobytes())
+        digest.update(','.join(self.movies_data.columns).encode('utf-8'))
+        return digest.hexdigest()
     
     def _create_enhanced_dataset(self):
         """Create comprehensive dataset with movies, web series, posters, and languages"""
@@ -298,33 +337,45 @@ class EnhancedDataProvider:
         
         return pd.DataFrame(data)
     
+    def _value_mask(self, column, value):
+        """Boolean mask of rows whose categorical column equals value, compared on integer codes"""
+        values = self.movies_data[column]
+        code = values.cat.categories.get_indexer([value])[0]
+        if code < 0:
+            return np.zeros(len(values), dtype=bool)
+        return values.cat.codes.to_numpy() == code
+    
     def get_movies_only(self):
         """Get only movies from the dataset"""
-        return self.movies_data[self.movies_data['type'] == 'movie']
+        return self.movies_data[self._value_mask('type', 'movie')]
     
     def get_web_series_only(self):
         """Get only web series from the dataset"""
-        return self.movies_data[self.movies_data['type'] == 'web_series']
+        return self.movies_data[self._value_mask('type', 'web_series')]
     
     def get_by_language(self, language):
         """Get content by specific language"""
-        return self.movies_data[self.movies_data['language'] == language]
+        return self.movies_data[self._value_mask('language', language)]
     
     def get_by_type_and_language(self, content_type, language):
         """Get content by type and language"""
         return self.movies_data[
-            (self.movies_data['type'] == content_type) & 
-            (self.movies_data['language'] == language)
+            self._value_mask('type', content_type) &
+            self._value_mask('language', language)
         ]
     
     def get_all_data(self):
         """Get complete dataset"""
         return self.movies_data
     
+    def get_fingerprint(self):
+        """Get a stable fingerprint of the dataset, used as a cache key"""
+        return self._fingerprint
+    
     def get_available_languages(self):
         """Get list of available languages"""
-        return sorted(self.movies_data['language'].unique().tolist())
+        return sorted(self.movies_data['language'].cat.categories.tolist())
     
     def get_available_types(self):
         """Get list of available content types"""
-        return sorted(self.movies_data['type'].unique().tolist())
+        return sorted(self.movies_data['type'].cat.categories.tolist())
@@ -5,51 +5,292 @@ Supports movies, web series, posters, and multiple languages
 
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MultiLabelBinarizer
 import re
 
+from similarity_index import TopKSimilarityIndex
+from ann_index import IVFIndex
+from ranking import top_k_indices, top_k_rows
+from facet_index import FacetIndex, intersect_postings
+from field_tokenizer import tokenize_field
+from entity_registry import EntityRegistry
+import model_store
+
+# Weights applied to each matching genre, actor and director
+GENRE_MATCH_WEIGHT = 2.0
+ACTOR_MATCH_WEIGHT = 1.5
+DIRECTOR_MATCH_WEIGHT = 1.5
+
+# Normalized rating score of titles without an IMDB rating (NaN)
+UNRATED_SCORE = 0.0
+
 class EnhancedMovieRecommender:
-    def __init__(self, data_provider):
+    def __init__(self, data_provider, similarity_top_k=50, similarity_backend='exact', refit_fraction=0.2,
+                 n_jobs=1, fuzzy_names=False):
+        """
+        Args:
+            data_provider: EnhancedDataProvider supplying the catalog
+            similarity_top_k: neighbours kept per title by the exact index
+            similarity_backend: 'exact', 'ivf', or an index object exposing
+                build(features) and query(item_idx, top_n)
+            refit_fraction: partial_fit refits from scratch once more than
+                this fraction of the catalog changed since the last fit
+            n_jobs: worker processes building the exact similarity index;
+                -1 uses every CPU
+            fuzzy_names: resolve preferred actors and directors that match no
+                name exactly by an unambiguous name prefix
+        """
         self.data_provider = data_provider
+        self.similarity_top_k = similarity_top_k
+        self.similarity_backend = similarity_backend
+        self.refit_fraction = refit_fraction
+        self.n_jobs = n_jobs
+        self.fuzzy_names = fuzzy_names
+        self._rows_changed_since_fit = 0
         self.df = None
         self.tfidf_matrix = None
         self.genre_matrix = None
-        self.similarity_matrix = None
+        self.tfidf_vectorizer = None
+        self.genre_incidence = None
+        self.actor_matrix = None
+        self.director_matrix = None
+        self.actor_names = None
+        self.genre_vocabulary = {}
+        self.actor_registry = EntityRegistry()
+        self.director_registry = EntityRegistry()
+        self.similarity_index = None
+        self.facets = {}
         self.is_fitted = False
     
-    def fit(self, df=None):
-        """Fit the recommendation system with data"""
+    def fit(self, df=None, field_encodings=None):
+        """
+        Fit the recommendation system with data
+        
+        Args:
+            df: Catalog frame; the data provider's catalog when omitted
+            field_encodings: Tokenized genre/actors/director fields of df, as
+                returned by catalog_loader.load_catalog; when df is omitted
+                the provider's encodings are used, so a loaded catalog is
+                not tokenized twice
+        """
         if df is None:
             self.df = self.data_provider.get_all_data()
+            if field_encodings is None:
+                field_encodings = getattr(self.data_provider, 'field_encodings', None)
         else:
             self.df = df
         
-        # Process genres
-        self.df['genres'] = self.df['genre'].apply(lambda x: [g.strip() for g in str(x).split(',')])
-        
-        # Create genre matrix
-        mlb = MultiLabelBinarizer()
-        self.genre_matrix = pd.DataFrame(
-            mlb.fit_transform(self.df['genres']),
-            columns=mlb.classes_,
-            index=self.df.index
+        # Process genres, each field tokenized once
+        genres = self._tokenized('genre', field_encodings).sorted()
+        self.df['genres'] = genres.row_lists()
+        self.actor_names = self._tokenized('actors', field_encodings)
+        directors = self._tokenized('director', field_encodings)
+        
+        # Sparse incidence matrices used for preference scoring
+        self.genre_incidence = genres.to_csr()
+        self.genre_vocabulary = {genre: i for i, genre in enumerate(genres.vocabulary)}
+        self.genre_matrix = pd.DataFrame.sparse.from_spmatrix(
+            self.genre_incidence, index=self.df.index, columns=genres.vocabulary
         )
         
-        # Create text features for TF-IDF
-        self.df['text_features'] = self.df.apply(self._create_text_features, axis=1)
+        # Actors and directors are matched by registry ID, so names that
+        # differ only in case, spacing or accents are one entity
+        self.actor_registry = EntityRegistry()
+        self.director_registry = EntityRegistry()
+        self.actor_matrix = self._register(self.actor_names, self.actor_registry).to_csr()
+        self.director_matrix = self._register(directors, self.director_registry).to_csr()
+        
+        self._build_facets()
+        
+        # Create text features for TF-IDF; they are only needed to build the
+        # matrix, so they are not kept on the catalog
+        text_features = self.df.apply(self._create_text_features, axis=1)
         
         # TF-IDF vectorization
-        tfidf = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.tfidf_matrix = tfidf.fit_transform(self.df['text_features'])
+        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(text_features)
         
-        # Calculate similarity matrix
-        self.similarity_matrix = cosine_similarity(self.tfidf_matrix)
+        # Build the similarity index (exact top-K or approximate)
+        self.similarity_index = self._create_similarity_index().build(self.tfidf_matrix)
         
+        self._rows_changed_since_fit = 0
         self.is_fitted = True
         return self
     
+    def partial_fit(self, new_rows):
+        """
+        Add or update titles without refitting from scratch
+        
+        Rows whose title is already in the catalog replace that title
+        (upsert); the others are appended. Genre, actor and director
+        vocabularies grow with the new rows, the TF-IDF vocabulary and idf
+        stay frozen, and the similarity index only recomputes neighbours for
+        the changed titles and the titles that listed them. Once more than
+        refit_fraction of the catalog changed since the last fit, the model
+        is refitted so the TF-IDF vocabulary follows the data.
+        
+        Args:
+            new_rows: DataFrame with the catalog columns
+        
+        Returns:
+            self
+        """
+        if not self.is_fitted:
+            return self.fit(new_rows.copy())
+        
+        catalog, changed = self._upsert_catalog(new_rows)
+        self._rows_changed_since_fit += len(changed)
+        if self._rows_changed_since_fit > self.refit_fraction * len(catalog):
+            return self.fit(catalog)
+        
+        n_items = len(catalog)
+        changed_df = catalog.iloc[changed]
+        
+        # Changed rows tokenized with the vocabularies extended by new entities
+        genres = tokenize_field(changed_df['genre'], vocabulary=self.genre_vocabulary)
+        actor_names = tokenize_field(changed_df['actors'], vocabulary=self.actor_names.vocabulary)
+        actors = self._register(actor_names, self.actor_registry)
+        directors = self._register(tokenize_field(changed_df['director']), self.director_registry)
+        self.genre_vocabulary = {genre: i for i, genre in enumerate(genres.vocabulary)}
+        
+        # Derived columns, computed for the changed rows only
+        text_features = changed_df.apply(self._create_text_features, axis=1).tolist()
+        catalog['genres'] = self._set_rows(self.df['genres'], changed, genres.row_lists(), n_items)
+        
+        # Incidence matrices with the changed rows replaced
+        self.genre_incidence = self._replace_rows(self.genre_incidence, changed, genres.to_csr(), n_items)
+        self.actor_matrix = self._replace_rows(self.actor_matrix, changed, actors.to_csr(), n_items)
+        self.director_matrix = self._replace_rows(self.director_matrix, changed, directors.to_csr(), n_items)
+        self.actor_names = self._replace_field_rows(self.actor_names, changed, actor_names, n_items)
+        self.genre_matrix = pd.DataFrame.sparse.from_spmatrix(
+            self.genre_incidence, index=catalog.index, columns=list(self.genre_vocabulary)
+        )
+        
+        # TF-IDF rows from the frozen vocabulary
+        self.tfidf_matrix = self._replace_rows(
+            self.tfidf_matrix, changed, self.tfidf_vectorizer.transform(text_features), n_items
+        )
+        
+        self.df = catalog
+        self._build_facets()
+        if hasattr(self.similarity_index, 'update'):
+            self.similarity_index.update(self.tfidf_matrix, changed)
+        else:
+            self.similarity_index.build(self.tfidf_matrix)
+        return self
+    
+    def _upsert_catalog(self, new_rows):
+        """Merge new rows into the catalog by title
+        
+        Returns:
+            Tuple of (catalog without derived columns, positions of the
+            updated and appended rows)
+        """
+        catalog = self.df.drop(columns=['genres'])
+        new_rows = new_rows.drop_duplicates('title', keep='last').reset_index(drop=True)
+        new_rows = new_rows.reindex(columns=catalog.columns)
+        
+        # Match the catalog dtypes; categorical columns take on any new
+        # values as extra categories
+        for column in catalog.columns:
+            if isinstance(catalog[column].dtype, pd.CategoricalDtype):
+                missing = pd.Index(new_rows[column].dropna().unique()).difference(catalog[column].cat.categories)
+                if len(missing) > 0:
+                    catalog[column] = catalog[column].cat.add_categories(missing)
+                new_rows[column] = pd.Categorical(new_rows[column], categories=catalog[column].cat.categories)
+            else:
+                try:
+                    new_rows[column] = new_rows[column].astype(catalog[column].dtype)
+                except (TypeError, ValueError):
+                    pass
+        
+        title_positions = pd.Series(np.arange(len(catalog)), index=catalog['title'].values)
+        title_positions = title_positions[~title_positions.index.duplicated()]
+        existing = title_positions.reindex(new_rows['title'].values).to_numpy()
+        is_update = ~np.isnan(existing)
+        updated = existing[is_update].astype(np.int64)
+        
+        # Rows of the stacked frame making up the merged catalog
+        n_existing = len(catalog)
+        take = np.concatenate([np.arange(n_existing), n_existing + np.flatnonzero(~is_update)])
+        take[updated] = n_existing + np.flatnonzero(is_update)
+        catalog = pd.concat([catalog, new_rows], ignore_index=True).iloc[take].reset_index(drop=True)
+        return catalog, np.concatenate([updated, np.arange(n_existing, len(catalog))])
+    
+    @staticmethod
+    def _set_rows(values, rows, new_values, n_rows):
+        """Copy an object column, extend it to n_rows and overwrite the given rows"""
+        result = np.empty(n_rows, dtype=object)
+        result[:len(values)] = values.to_numpy()
+        for row, value in zip(rows, new_values):
+            result[row] = value
+        return result
+    
+    @staticmethod
+    def _replace_rows(matrix, rows, replacement, n_rows):
+        """Overwrite (and append) rows of a CSR matrix, widening it to the replacement's columns"""
+        matrix = sparse.csr_matrix(
+            (matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], replacement.shape[1])
+        )
+        stacked = sparse.vstack([matrix, replacement.astype(matrix.dtype)], format='csr')
+        take = np.arange(n_rows)
+        take[rows] = matrix.shape[0] + np.arange(len(rows))
+        return stacked[take]
+    
+    def _tokenized(self, column, field_encodings):
+        """Get a column's tokenized field, reusing a given encoding that covers every row"""
+        field = (field_encodings or {}).get(column)
+        if field is not None and field.n_rows == len(self.df):
+            return field
+        return tokenize_field(self.df[column])
+    
+    @staticmethod
+    def _register(field, registry):
+        """Intern a field's names in an entity registry and code its rows by entity ID"""
+        return field.recode(registry.intern_all(field.vocabulary), registry.keys)
+    
+    @staticmethod
+    def _replace_field_rows(field, rows, replacement, n_rows):
+        """Overwrite (and append) rows of a MultiValuedField"""
+        take = np.arange(n_rows)
+        take[rows] = field.n_rows + np.arange(len(rows))
+        return field.append(replacement).take(take)
+    
+    def _build_facets(self):
+        """Build the facet indexes answering type, language and genre filters
+        
+        Postings are also kept in descending rating order for top-N queries.
+        """
+        ratings = self.df['imdb_rating'].to_numpy()
+        self.facets = {
+            'type': FacetIndex.from_codes(*self._factorize(self.df['type'])).rank_by(ratings),
+            'language': FacetIndex.from_codes(*self._factorize(self.df['language'])).rank_by(ratings),
+            'genre': FacetIndex.from_incidence(self.genre_incidence, list(self.genre_vocabulary)).rank_by(ratings)
+        }
+    
+    def save(self, path):
+        """Save the fitted model as a versioned artifact bundle directory"""
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before saving")
+        model_store.save_recommender(self, path)
+        return path
+    
+    @classmethod
+    def load(cls, path, data_provider=None, mmap=True):
+        """Load a fitted model saved with save(), memory-mapping its arrays read-only"""
+        return model_store.load_recommender(cls, path, data_provider, mmap)
+    
+    def _create_similarity_index(self):
+        """Create the configured similarity backend"""
+        if self.similarity_backend == 'exact':
+            return TopKSimilarityIndex(k=self.similarity_top_k, n_jobs=self.n_jobs)
+        if self.similarity_backend == 'ivf':
+            return IVFIndex()
+        if isinstance(self.similarity_backend, str):
+            raise ValueError(f"Unknown similarity backend '{self.similarity_backend}'")
+        return self.similarity_backend
+    
     def _create_text_features(self, row):
         """Create text features for TF-IDF"""
         features = []
@@ -67,27 +308,24 @@ class EnhancedMovieRecommender:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before getting recommendations")
         
-        # Filter by content type if specified
-        content_type = user_preferences.get('content_type', 'all')
-        if content_type != 'all':
-            filtered_df = self.df[self.df['type'] == content_type]
-        else:
-            filtered_df = self.df
-        
-        # Filter by language if specified
-        language = user_preferences.get('language', 'all')
-        if language != 'all':
-            filtered_df = filtered_df[filtered_df['language'] == language]
+        # Filter by content type and language, keeping row positions
+        positions = self._filter_positions(user_preferences)
+        if positions is None:
+            positions = np.arange(len(self.df))
         
         # Check if we have any data after filtering
-        if len(filtered_df) == 0:
+        if len(positions) == 0:
             return []
+        filtered_df = self.df.iloc[positions]
+        
+        # Resolve the user's genres, actors and directors to IDs once
+        resolved = self._resolve_preferences(user_preferences)
         
         # Calculate preference scores
-        preference_scores = self._calculate_preference_scores(filtered_df, user_preferences)
+        preference_scores = self._calculate_preference_scores(positions, resolved)
         
         # Get IMDB ratings
-        imdb_scores = filtered_df['imdb_rating'].values
+        imdb_scores = filtered_df['imdb_rating'].to_numpy(dtype=np.float64)
         
         # Normalize scores safely
         if len(preference_scores) > 0:
@@ -98,98 +336,233 @@ class EnhancedMovieRecommender:
                 preference_scores = np.zeros_like(preference_scores)
         
         if len(imdb_scores) > 0:
-            imdb_min, imdb_max = imdb_scores.min(), imdb_scores.max()
+            # Unrated titles are left out of the range and get UNRATED_SCORE
+            rated = ~np.isnan(imdb_scores)
+            imdb_min, imdb_max = (imdb_scores[rated].min(), imdb_scores[rated].max()) if rated.any() else (0, 0)
             if imdb_max > imdb_min:
                 imdb_scores = (imdb_scores - imdb_min) / (imdb_max - imdb_min)
             else:
                 imdb_scores = np.ones_like(imdb_scores)
+            imdb_scores = np.where(rated, imdb_scores, UNRATED_SCORE)
         
         # Combine scores
         combined_scores = (rating_weight * imdb_scores + preference_weight * preference_scores)
         
         # Get top recommendations
-        top_indices = np.argsort(combined_scores)[::-1][:min(top_n, len(filtered_df))]
+        top_indices = top_k_indices(combined_scores, top_n)
         
         recommendations = []
         for idx in top_indices:
-            movie = filtered_df.iloc[idx]
-            recommendations.append({
-                'title': movie['title'],
-                'year': movie['year'],
-                'type': movie['type'],
-                'genres': movie['genres'],
-                'director': movie['director'],
-                'actors': movie['actors'].split(',') if pd.notna(movie['actors']) else [],
-                'imdb_rating': movie['imdb_rating'],
-                'description': movie['description'],
-                'poster_url': movie['poster_url'],
-                'language': movie['language'],
-                'duration': movie['duration'],
-                'country': movie['country'],
-                'explanation': self._explain_recommendation(movie, user_preferences),
-                'similarity_score': float(combined_scores[idx])
-            })
+            recommendations.append(
+                self._format_recommendation(positions[idx], resolved, combined_scores[idx])
+            )
         
         return recommendations
     
-    def _calculate_preference_scores(self, df, user_preferences):
-        """Calculate preference match scores"""
-        scores = np.zeros(len(df))
-        
-        # Genre preference
-        if 'genres' in user_preferences and user_preferences['genres']:
-            for i, movie in df.iterrows():
-                movie_genres = set(movie['genres'])
-                user_genres = set(user_preferences['genres'])
-                genre_overlap = len(movie_genres.intersection(user_genres))
-                scores[i] += genre_overlap * 2  # Higher weight for genres
-        
-        # Actor preference
-        if 'actors' in user_preferences and user_preferences['actors']:
-            for i, movie in df.iterrows():
-                if pd.notna(movie['actors']):
-                    movie_actors = set([a.strip().lower() for a in movie['actors'].split(',')])
-                    user_actors = set([a.strip().lower() for a in user_preferences['actors']])
-                    actor_overlap = len(movie_actors.intersection(user_actors))
-                    scores[i] += actor_overlap * 1.5
-        
-        # Director preference
-        if 'directors' in user_preferences and user_preferences['directors']:
-            for i, movie in df.iterrows():
-                if pd.notna(movie['director']):
-                    movie_director = movie['director'].strip().lower()
-                    user_directors = [d.strip().lower() for d in user_preferences['directors']]
-                    if movie_director in user_directors:
-                        scores[i] += 1.5
-        
-        return scores
+    def get_recommendations_batch(self, list_of_preferences, top_n=5, rating_weight=0.7,
+                                  preference_weight=0.3, chunk_size=None):
+        """
+        Get personalized recommendations for many users at once
+        
+        Users are encoded into sparse preference matrices and scored against
+        the whole catalog with one matrix product per chunk. Each user's
+        content type and language filters and score normalization match
+        get_recommendations.
+        
+        Args:
+            list_of_preferences: list of user preference dicts
+            top_n: number of recommendations per user
+            rating_weight: weight for IMDB rating (0-1)
+            preference_weight: weight for user preference matching (0-1)
+            chunk_size: users scored per chunk; by default chosen so a chunk
+                holds about 16M scores
+        
+        Returns:
+            List with one recommendation list per user, in input order
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before getting recommendations")
+        
+        n_items = len(self.df)
+        if chunk_size is None:
+            chunk_size = max(1, 2 ** 24 // max(n_items, 1))
+        ratings = self.df['imdb_rating'].values.astype(np.float64)
+        rated = ~np.isnan(ratings)
+        
+        results = []
+        for start in range(0, len(list_of_preferences), chunk_size):
+            chunk = list_of_preferences[start:start + chunk_size]
+            resolved_chunk = [self._resolve_preferences(user_preferences) for user_preferences in chunk]
+            preference_scores = self._score_preference_matrix(resolved_chunk)
+            allowed = self._filter_mask(chunk)
+            
+            preference_scores = self._normalize_rows(preference_scores, allowed, empty_value=0.0)
+            imdb_scores = self._normalize_rows(
+                np.broadcast_to(ratings, preference_scores.shape), allowed & rated, empty_value=1.0
+            )
+            imdb_scores[:, ~rated] = UNRATED_SCORE
+            combined_scores = rating_weight * imdb_scores + preference_weight * preference_scores
+            combined_scores[~allowed] = -np.inf
+            
+            top_indices, top_scores = top_k_rows(combined_scores, top_n)
+            for resolved, indices, scores in zip(resolved_chunk, top_indices, top_scores):
+                results.append([
+                    self._format_recommendation(idx, resolved, score)
+                    for idx, score in zip(indices, scores) if np.isfinite(score)
+                ])
+        
+        return results
+    
+    def _score_preference_matrix(self, resolved_preferences, positions=None):
+        """Score titles for a chunk of users as a dense (users x titles) array
+        
+        Takes the users' _resolve_preferences results and scores every
+        title, or only the titles at the given row positions.
+        """
+        genre_incidence, actor_matrix, director_matrix = \
+            self.genre_incidence, self.actor_matrix, self.director_matrix
+        if positions is not None:
+            genre_incidence = genre_incidence[positions]
+            actor_matrix = actor_matrix[positions]
+            director_matrix = director_matrix[positions]
+        
+        user_genres = self._encode_preferences(resolved_preferences, 'genres', len(self.genre_vocabulary))
+        user_actors = self._encode_preferences(resolved_preferences, 'actors', len(self.actor_registry))
+        user_directors = self._encode_preferences(resolved_preferences, 'directors', len(self.director_registry))
+        scores = (
+            GENRE_MATCH_WEIGHT * (user_genres @ genre_incidence.T) +
+            ACTOR_MATCH_WEIGHT * (user_actors @ actor_matrix.T) +
+            DIRECTOR_MATCH_WEIGHT * (user_directors @ director_matrix.T)
+        )
+        return scores.toarray().astype(np.float64)
     
-    def _explain_recommendation(self, movie, user_preferences):
-        """Explain why a movie was recommended"""
+    def _resolve_preferences(self, user_preferences):
+        """Resolve a user's preferred genres, actors and directors to sorted entity ID arrays
+        
+        Genres must match exactly; actor and director names are resolved
+        through their registries, so case, spacing and accents do not matter
+        (nor, with fuzzy_names, unambiguous prefixes).
+        """
+        genre_ids = {self.genre_vocabulary.get(genre) for genre in user_preferences.get('genres') or []}
+        genre_ids.discard(None)
+        return {
+            'genres': np.array(sorted(genre_ids), dtype=np.int32),
+            'actors': self.actor_registry.resolve_all(user_preferences.get('actors'), self.fuzzy_names),
+            'directors': self.director_registry.resolve_all(user_preferences.get('directors'), self.fuzzy_names)
+        }
+    
+    @staticmethod
+    def _encode_preferences(resolved_preferences, key, n_entities):
+        """Encode one resolved preference field of many users as a binary (users x entities) CSR matrix"""
+        entity_ids = [resolved[key] for resolved in resolved_preferences]
+        offsets = np.concatenate(([0], np.cumsum([len(ids) for ids in entity_ids]))).astype(np.int64)
+        return sparse.csr_matrix(
+            (np.ones(offsets[-1], dtype=np.float32),
+             np.concatenate(entity_ids) if entity_ids else np.zeros(0, dtype=np.int32),
+             offsets),
+            shape=(len(resolved_preferences), n_entities)
+        )
+    
+    def _filter_positions(self, user_preferences):
+        """Get the sorted row positions passing a user's type and language filters
+        
+        Returns None when the user filters nothing, otherwise the
+        intersection of the matching facet postings.
+        """
+        postings = []
+        content_type = user_preferences.get('content_type', 'all')
+        if content_type != 'all':
+            postings.append(self.facets['type'].postings(content_type))
+        language = user_preferences.get('language', 'all')
+        if language != 'all':
+            postings.append(self.facets['language'].postings(language))
+        return intersect_postings(postings) if postings else None
+    
+    def _filter_mask(self, list_of_preferences):
+        """Get a (users x titles) mask of titles passing each user's type and language filters"""
+        mask = np.ones((len(list_of_preferences), len(self.df)), dtype=bool)
+        for row_id, user_preferences in enumerate(list_of_preferences):
+            positions = self._filter_positions(user_preferences)
+            if positions is not None:
+                mask[row_id] = False
+                mask[row_id, positions] = True
+        return mask
+    
+    @staticmethod
+    def _factorize(values):
+        """Get (codes, values) of a column, reusing the codes of a categorical column"""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.cat.codes.to_numpy(), values.cat.categories
+        return pd.factorize(values)
+    
+    @staticmethod
+    def _row_overlap(matrix, position, entity_ids):
+        """Get the sorted entity IDs present both in a CSR matrix row and in entity_ids"""
+        row = matrix.indices[matrix.indptr[position]:matrix.indptr[position + 1]]
+        return np.intersect1d(row, entity_ids, assume_unique=True)
+    
+    @staticmethod
+    def _normalize_rows(scores, allowed, empty_value):
+        """Min-max normalize each row over its allowed entries
+        
+        Rows whose allowed entries are all equal get empty_value, as in
+        get_recommendations.
+        """
+        row_min = np.where(allowed, scores, np.inf).min(axis=1, keepdims=True)
+        row_max = np.where(allowed, scores, -np.inf).max(axis=1, keepdims=True)
+        spread = row_max - row_min
+        varied = spread > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            normalized = np.where(varied, (scores - row_min) / np.where(varied, spread, 1), empty_value)
+        return normalized
+    
+    def _format_recommendation(self, position, resolved, score):
+        """Build the recommendation dict returned for the title at a row position"""
+        movie = self.df.iloc[position]
+        return {
+            'title': movie['title'],
+            'year': movie['year'],
+            'type': movie['type'],
+            'genres': movie['genres'],
+            'director': movie['director'],
+            'actors': self.actor_names.row_values(position),
+            'imdb_rating': movie['imdb_rating'],
+            'description': movie['description'],
+            'poster_url': movie['poster_url'],
+            'language': movie['language'],
+            'duration': movie['duration'],
+            'country': movie['country'],
+            'explanation': self._explain_recommendation(position, resolved),
+            'similarity_score': float(score)
+        }
+    
+    def _calculate_preference_scores(self, positions, resolved):
+        """Calculate preference match scores for the titles at the given row positions"""
+        return self._score_preference_matrix([resolved], positions)[0]
+    
+    def _explain_recommendation(self, position, resolved):
+        """Explain why the title at a row position was recommended
+        
+        Matches intersect the title's entity IDs with the user's resolved IDs.
+        """
+        movie = self.df.iloc[position]
         reasons = []
         
         # Genre match
-        if 'genres' in user_preferences and user_preferences['genres']:
-            movie_genres = set(movie['genres'])
-            user_genres = set(user_preferences['genres'])
-            genre_overlap = movie_genres.intersection(user_genres)
-            if genre_overlap:
-                reasons.append(f"Matches your preferred genres: {', '.join(genre_overlap)}")
+        genre_overlap = self._row_overlap(self.genre_incidence, position, resolved['genres'])
+        if len(genre_overlap) > 0:
+            genres = list(self.genre_vocabulary)
+            reasons.append(f"Matches your preferred genres: {', '.join(genres[i] for i in genre_overlap)}")
         
         # Actor match
-        if 'actors' in user_preferences and user_preferences['actors'] and pd.notna(movie['actors']):
-            movie_actors = set([a.strip().lower() for a in movie['actors'].split(',')])
-            user_actors = set([a.strip().lower() for a in user_preferences['actors']])
-            actor_overlap = movie_actors.intersection(user_actors)
-            if actor_overlap:
-                reasons.append(f"Features your favorite actors: {', '.join(actor_overlap)}")
+        actor_overlap = self._row_overlap(self.actor_matrix, position, resolved['actors'])
+        if len(actor_overlap) > 0:
+            names = self.actor_registry.names
+            reasons.append(f"Features your favorite actors: {', '.join(names[i] for i in actor_overlap)}")
         
         # Director match
-        if 'directors' in user_preferences and user_preferences['directors'] and pd.notna(movie['director']):
-            movie_director = movie['director'].strip().lower()
-            user_directors = [d.strip().lower() for d in user_preferences['directors']]
-            if movie_director in user_directors:
-                reasons.append(f"Directed by your favorite director: {movie['director']}")
+        if len(self._row_overlap(self.director_matrix, position, resolved['directors'])) > 0:
+            reasons.append(f"Directed by your favorite director: {movie['director']}")
         
         # High rating
         if movie['imdb_rating'] >= 8.0:
@@ -207,23 +580,18 @@ class EnhancedMovieRecommender:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before getting similar movies")
         
-        # Find the movie index
-        movie_idx = self.df[self.df['title'] == title].index
+        # Find the movie position
+        movie_idx = np.flatnonzero(self.df['title'].values == title)
         if len(movie_idx) == 0:
             return []
         
         movie_idx = movie_idx[0]
         
-        # Get similarity scores
-        sim_scores = list(enumerate(self.similarity_matrix[movie_idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        
-        # Get top similar movies (excluding itself)
-        sim_scores = sim_scores[1:min(top_n+1, len(sim_scores))]
-        movie_indices = [i[0] for i in sim_scores]
+        # Get top similar movies (the index never contains the movie itself)
+        movie_indices, sim_scores = self.similarity_index.query(movie_idx, top_n)
         
         similar_movies = []
-        for idx in movie_indices:
+        for idx, score in zip(movie_indices, sim_scores):
             movie = self.df.iloc[idx]
             similar_movies.append({
                 'title': movie['title'],
@@ -231,11 +599,11 @@ class EnhancedMovieRecommender:
                 'type': movie['type'],
                 'genres': movie['genres'],
                 'director': movie['director'],
-                'actors': movie['actors'].split(',') if pd.notna(movie['actors']) else [],
+                'actors': self.actor_names.row_values(idx),
                 'imdb_rating': movie['imdb_rating'],
                 'poster_url': movie['poster_url'],
                 'language': movie['language'],
-                'similarity_score': float(sim_scores[movie_indices.index(idx)][1])
+                'similarity_score': float(score)
             })
         
         return similar_movies
@@ -246,23 +614,21 @@ class EnhancedMovieRecommender:
             raise ValueError("Model must be fitted before getting genre recommendations")
         
         # Filter by genre and minimum rating
-        genre_movies = self.df[
-            (self.df['genres'].apply(lambda x: genre in x)) & 
-            (self.df['imdb_rating'] >= min_rating)
-        ].sort_values('imdb_rating', ascending=False)
+        positions = self.facets['genre'].top(genre, top_n, min_rating)
+        genre_movies = self.df.iloc[positions]
         
         if len(genre_movies) == 0:
             return []
         
         recommendations = []
-        for _, movie in genre_movies.head(top_n).iterrows():
+        for position, (_, movie) in zip(positions, genre_movies.iterrows()):
             recommendations.append({
                 'title': movie['title'],
                 'year': movie['year'],
                 'type': movie['type'],
                 'genres': movie['genres'],
                 'director': movie['director'],
-                'actors': movie['actors'].split(',') if pd.notna(movie['actors']) else [],
+                'actors': self.actor_names.row_values(position),
                 'imdb_rating': movie['imdb_rating'],
                 'poster_url': movie['poster_url'],
                 'language': movie['language'],
@@ -276,20 +642,21 @@ class EnhancedMovieRecommender:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before getting language recommendations")
         
-        language_content = self.df[self.df['language'] == language].sort_values('imdb_rating', ascending=False)
+        positions = self.facets['language'].top(language, top_n)
+        language_content = self.df.iloc[positions]
         
         if len(language_content) == 0:
             return []
         
         recommendations = []
-        for _, content in language_content.head(top_n).iterrows():
+        for position, (_, content) in zip(positions, language_content.iterrows()):
             recommendations.append({
                 'title': content['title'],
                 'year': content['year'],
                 'type': content['type'],
                 'genres': content['genres'],
                 'director': content['director'],
-                'actors': content['actors'].split(',') if pd.notna(content['actors']) else [],
+                'actors': self.actor_names.row_values(position),
                 'imdb_rating': content['imdb_rating'],
                 'poster_url': content['poster_url'],
                 'language': content['language'],
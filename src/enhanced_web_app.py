@@ -15,8 +15,10 @@ import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-from enhanced_data import EnhancedDataProvider
-from enhanced_recommendation import EnhancedMovieRecommender
+from app_cache import load_recommendation_system, get_available_genres, get_title_options
+
+# Catalog file served by the app (e.g. IMDBScraper output); None uses the built-in dataset
+CATALOG_PATH = None
 
 # Page configuration
 st.set_page_config(
@@ -116,27 +118,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_recommendation_system():
-    """Load and initialize the enhanced recommendation system"""
-    try:
-        data_provider = EnhancedDataProvider()
-        df = data_provider.get_all_data()
-        recommender = EnhancedMovieRecommender(data_provider)
-        recommender.fit(df)
-        return recommender, df, data_provider
-    except Exception as e:
-        st.error(f"Error loading recommendation system: {str(e)}")
-        return None, None, None
-
-def get_available_genres(df):
-    """Get list of available genres from the dataset"""
-    if df is None:
-        return []
-    all_genres = []
-    for genres in df['genre'].dropna():
-        all_genres.extend([g.strip() for g in genres.split(',')])
-    return sorted(list(set(all_genres)))
-
 def display_movie_card(movie, index=None):
     """Display a movie card with poster and enhanced styling"""
     index_text = f"#{index} " if index else ""
@@ -179,13 +160,13 @@ def main():
     st.markdown("### Get personalized recommendations for movies and web series with posters, multiple languages, and smart AI!")
     
     # Load recommendation system
-    recommender, df, data_provider = load_recommendation_system()
+    recommender, df, data_provider = load_recommendation_system(CATALOG_PATH)
     
     if recommender is None or df is None or data_provider is None:
         st.error("Failed to load the recommendation system. Please check the console for errors.")
         return
     
-    available_genres = get_available_genres(df)
+    available_genres = get_available_genres(recommender)
     available_languages = data_provider.get_available_languages()
     available_types = data_provider.get_available_types()
     
@@ -364,7 +345,7 @@ def main():
         st.subheader("🔍 Find Similar Content")
         content_search = st.selectbox(
             "Select content to find similar ones:",
-            options=df['title'].tolist()
+            options=get_title_options(data_provider.get_fingerprint(), recommender)
         )
         
         if st.button("Find Similar"):
@@ -0,0 +1,140 @@
+"""
+Entity Registry Module
+Normalized, interned actor and director names with prefix resolution of user input
+"""
+
+import bisect
+import unicodedata
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+def normalize_name(name) -> str:
+    """Normalize a name for matching: strip accents, casefold and collapse whitespace
+
+    'Álex  Pina' and 'alex pina' both become 'alex pina'.
+    """
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class EntityRegistry:
+    """Interns entity names to integer IDs by their normalized form
+
+    ``keys[i]`` is the normalized name of entity i and ``names[i]`` the
+    spelling it was first registered with, used for display. User input is
+    resolved to IDs once per request by exact normalized match. Only when
+    asked for (fuzzy=True) does an unmatched input fall back to a prefix of
+    the full name or of any of its words that identifies a single entity
+    (e.g. 'dicap' -> 'Leonardo DiCaprio'); by default an unknown name
+    resolves to nothing rather than to someone else. Prefixes are looked up
+    by binary search in a sorted key list, which acts as a compact prefix
+    trie.
+    """
+
+    def __init__(self, names: Iterable[str] = (), min_prefix: int = 3):
+        """
+        Args:
+            names: Names to register, in ID order
+            min_prefix: Shortest input that is resolved as a prefix
+        """
+        self.min_prefix = min_prefix
+        self.keys: List[str] = []
+        self.names: List[str] = []
+        self.ids = {}
+        self._prefix_keys = None
+        self._prefix_ids = None
+        self.intern_all(names)
+
+    @classmethod
+    def from_keys(cls, names: List[str], keys: List[str], min_prefix: int = 3) -> 'EntityRegistry':
+        """
+        Rebuild a registry from its saved names and normalized keys without normalizing again
+
+        Args:
+            names: Display names, in ID order
+            keys: Normalized names, in ID order
+            min_prefix: Shortest input that is resolved as a prefix
+        """
+        if len(names) != len(keys):
+            raise ValueError(f"Got {len(names)} names but {len(keys)} keys")
+        registry = cls(min_prefix=min_prefix)
+        registry.names = list(names)
+        registry.keys = list(keys)
+        registry.ids = dict(zip(registry.keys, range(len(registry.keys))))
+        return registry
+
+    def intern(self, name) -> int:
+        """Get the ID of a name, registering it when new"""
+        key = normalize_name(name)
+        entity_id = self.ids.get(key)
+        if entity_id is None:
+            entity_id = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.names.append(str(name))
+            self._prefix_keys = None
+        return entity_id
+
+    def intern_all(self, names: Iterable[str]) -> np.ndarray:
+        """Get the IDs of many names, registering the new ones"""
+        return np.array([self.intern(name) for name in names], dtype=np.int32)
+
+    def lookup(self, name) -> Optional[int]:
+        """Get the ID of a name by exact normalized match, or None"""
+        return self.ids.get(normalize_name(name))
+
+    def resolve(self, name, fuzzy: bool = False) -> Optional[int]:
+        """
+        Resolve user input to an entity ID
+
+        Args:
+            name: Full name (any case, spacing or accents)
+            fuzzy: Also accept an unambiguous prefix of a name or of one of
+                its words
+
+        Returns:
+            The entity ID, or None when nothing or more than one entity matches
+        """
+        key = normalize_name(name)
+        entity_id = self.ids.get(key)
+        if entity_id is not None or not fuzzy or len(key) < self.min_prefix:
+            return entity_id
+
+        if self._prefix_keys is None:
+            self._build_prefix_index()
+        start = bisect.bisect_left(self._prefix_keys, key)
+        match = None
+        for position in range(start, len(self._prefix_keys)):
+            if not self._prefix_keys[position].startswith(key):
+                break
+            candidate = self._prefix_ids[position]
+            if match is not None and candidate != match:
+                return None
+            match = candidate
+        return match
+
+    def resolve_all(self, names: Optional[Iterable[str]], fuzzy: bool = False) -> np.ndarray:
+        """Resolve many user inputs to the sorted array of distinct matching IDs"""
+        ids = {self.resolve(name, fuzzy) for name in names or ()}
+        ids.discard(None)
+        return np.array(sorted(ids), dtype=np.int32)
+
+    def _build_prefix_index(self):
+        """Sort every key and every word-boundary suffix of it ('leonardo dicaprio', 'dicaprio')"""
+        entries = []
+        for entity_id, key in enumerate(self.keys):
+            entries.append((key, entity_id))
+            for position, char in enumerate(key):
+                if char == ' ':
+                    entries.append((key[position + 1:], entity_id))
+        entries.sort()
+        self._prefix_keys = [key for key, _ in entries]
+        self._prefix_ids = [entity_id for _, entity_id in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.ids
@@ -0,0 +1,136 @@
+"""
+Facet Index Module
+Inverted indexes from facet values (type, language, genre) to sorted row IDs
+"""
+
+from typing import List
+
+import numpy as np
+from scipy import sparse
+
+
+class FacetIndex:
+    """Maps each value of a facet to the sorted array of rows that have it
+
+    The postings of value ``values[i]`` are ``row_ids[offsets[i]:offsets[i + 1]]``,
+    so a lookup is a dictionary access plus an array slice and never touches
+    rows outside the result. After rank_by(scores) the same slice of
+    ``ranked_row_ids`` holds the postings ordered by descending score, and
+    of ``ranked_keys`` the negated scores, ascending, for binary search.
+    The keys keep the scores' own floating dtype, so thresholds compare
+    exactly against the stored values.
+    """
+
+    _array_attributes = ('offsets', 'row_ids', 'ranked_row_ids', 'ranked_keys')
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.value_ids = {value: i for i, value in enumerate(self.values)}
+        self.offsets = np.zeros(len(self.values) + 1, dtype=np.int64)
+        self.row_ids = np.zeros(0, dtype=np.int32)
+        self.ranked_row_ids = np.zeros(0, dtype=np.int32)
+        self.ranked_keys = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def from_codes(cls, codes, values):
+        """
+        Build from a single-valued facet
+
+        Args:
+            codes: Per-row integer code into values, or -1 for missing
+            values: Facet values indexed by code
+        """
+        codes = np.asarray(codes)
+        present = np.flatnonzero(codes >= 0)
+        incidence = sparse.csr_matrix(
+            (np.ones(len(present), dtype=np.int8), (present, codes[present])),
+            shape=(len(codes), len(values))
+        )
+        return cls.from_incidence(incidence, values)
+
+    @classmethod
+    def from_incidence(cls, matrix, values):
+        """
+        Build from a multi-valued facet
+
+        Args:
+            matrix: (rows x values) sparse incidence matrix
+            values: Facet values indexed by column
+        """
+        index = cls(values)
+        columns = sparse.csc_matrix(matrix)
+        columns.sort_indices()
+        index.offsets = columns.indptr.astype(np.int64)
+        index.row_ids = columns.indices.astype(np.int32)
+        return index
+
+    def postings(self, value) -> np.ndarray:
+        """Get the sorted row IDs having value (empty when the value is unknown)"""
+        value_id = self.value_ids.get(value)
+        if value_id is None:
+            return self.row_ids[:0]
+        return self.row_ids[self.offsets[value_id]:self.offsets[value_id + 1]]
+
+    def rank_by(self, scores):
+        """
+        Sort every value's postings by descending score (ties keep row order)
+
+        Args:
+            scores: Per-row score, e.g. the IMDB rating; floating scores
+                keep their dtype, other scores become float64
+
+        Returns:
+            self
+        """
+        scores = np.asarray(scores)
+        if not np.issubdtype(scores.dtype, np.floating):
+            scores = scores.astype(np.float64)
+        keys = -scores[self.row_ids]
+        value_ids = np.repeat(np.arange(len(self.values)), np.diff(self.offsets))
+        order = np.lexsort((self.row_ids, keys, value_ids))
+        self.ranked_row_ids = self.row_ids[order]
+        self.ranked_keys = keys[order]
+        return self
+
+    def top(self, value, top_n, min_score=None) -> np.ndarray:
+        """
+        Get the highest-scoring rows having value
+
+        Args:
+            value: Facet value
+            top_n: Maximum number of rows
+            min_score: Only rows scoring at least this much
+
+        Returns:
+            Row IDs ordered by descending score
+        """
+        value_id = self.value_ids.get(value)
+        if value_id is None:
+            return self.ranked_row_ids[:0]
+        start, end = self.offsets[value_id], self.offsets[value_id + 1]
+        if min_score is not None:
+            # Cast the threshold to the keys' dtype so a float32 score equal
+            # to min_score is not lost to rounding (7.7 -> 7.699999809...)
+            threshold = -np.asarray(min_score, dtype=self.ranked_keys.dtype)
+            end = start + np.searchsorted(self.ranked_keys[start:end], threshold, side='right')
+        return self.ranked_row_ids[start:min(end, start + top_n)]
+
+    def __len__(self):
+        return len(self.values)
+
+
+def intersect_postings(postings: List[np.ndarray]) -> np.ndarray:
+    """Intersect sorted row-ID arrays, starting from the shortest
+
+    Each step binary-searches the current (shortest) result in the next
+    array, so the cost grows with the smaller side rather than the catalog.
+    """
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if len(result) == 0:
+            break
+        found = np.searchsorted(other, result)
+        found[found == len(other)] = 0
+        result = result[other[found] == result] if len(other) > 0 else result[:0]
+    return result
@@ -0,0 +1,77 @@
+"""
+HTTP Response Cache Module
+Persistent SQLite cache for scraped pages with TTLs and conditional revalidation
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class ResponseCache:
+    """URL-keyed response store shared by all scraper threads
+
+    Entries younger than ``ttl`` seconds are served without any request.
+    Older entries are revalidated with If-None-Match / If-Modified-Since, so
+    an unchanged page costs a 304 response instead of a full download.
+    """
+
+    def __init__(self, path: str = 'imdb_cache.sqlite', ttl: float = 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, '
+                'last_modified TEXT, fetched_at REAL NOT NULL)'
+            )
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Get the cached entry for a URL, fresh or stale"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, body, etag, last_modified, fetched_at FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """Check whether an entry can be served without revalidation"""
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store or replace the response for a URL"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, time.time())
+            )
+
+    def touch(self, url: str):
+        """Mark an entry as freshly revalidated"""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE responses SET fetched_at = ? WHERE url = ?', (time.time(), url))
+
+    def record(self, outcome: str):
+        """Count a cache outcome ('hits', 'revalidated' or 'misses')"""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,155 @@
+"""
+HTTP Transport Module
+Pooled requests session with timeouts, retries with jittered backoff and latency tracking
+"""
+
+import bisect
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of request latencies"""
+
+    def __init__(self, bounds_ms=LATENCY_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds_ms, milliseconds)] += 1
+            self.total += 1
+            self.max_ms = max(self.max_ms, milliseconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Get the upper bound (ms) of the bucket containing the p-th percentile"""
+        with self._lock:
+            return self._percentile(p)
+
+    def _percentile(self, p: float) -> Optional[float]:
+        """percentile() for callers already holding the lock"""
+        if self.total == 0:
+            return None
+        target = p / 100 * self.total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count > 0:
+                return float(self.bounds_ms[i]) if i < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        """Get bucket counts and tail percentiles from one consistent snapshot"""
+        labels = [f"<={bound}ms" for bound in self.bounds_ms] + [f">{self.bounds_ms[-1]}ms"]
+        with self._lock:
+            return {
+                'count': self.total,
+                'p50_ms': self._percentile(50),
+                'p90_ms': self._percentile(90),
+                'p99_ms': self._percentile(99),
+                'max_ms': self.max_ms,
+                'buckets': dict(zip(labels, self.counts))
+            }
+
+
+class HTTPTransport:
+    """requests.Session wrapper used by IMDBScraper for every request
+
+    Connection pools are sized for the crawl concurrency, every request has
+    connect/read timeouts, and 429/5xx responses or connection errors are
+    retried with exponential backoff and full jitter, honouring Retry-After.
+    One transport is shared by the scraper's worker threads, so the retry
+    counter and latency histogram are updated under locks.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5.0, read_timeout: float = 20.0,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 retry_statuses=(429, 500, 502, 503, 504), headers: Optional[Dict] = None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.latency = LatencyHistogram()
+        self.retries = 0
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _count_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), self.backoff_max)
+
+    def get(self, url: str, headers: Optional[Dict] = None,
+            before_attempt: Optional[Callable[[], None]] = None) -> requests.Response:
+        """
+        GET a URL, retrying transient failures
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers
+            before_attempt: Called before every attempt, e.g. to take a
+                rate-limiter token so retries stay within the crawl budget
+
+        Returns:
+            The final response (which may still be an error status)
+        """
+        for attempt in range(self.max_retries + 1):
+            if before_attempt is not None:
+                before_attempt()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self.latency.record(time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    raise
+                self._count_retry()
+                time.sleep(self._backoff(attempt))
+                continue
+            self.latency.record(time.perf_counter() - start)
+
+            if response.status_code in self.retry_statuses and attempt < self.max_retries:
+                delay = self._retry_after(response)
+                response.close()
+                self._count_retry()
+                time.sleep(delay if delay is not None else self._backoff(attempt))
+                continue
+            return response
@@ -6,19 +6,187 @@ Collects movie data from IMDB for real-time recommendations
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import json
-import re
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from rate_limiter import TokenBucket, HostConcurrencyLimiter
+from http_cache import ResponseCache
+from page_parser import parse_movie_page
+from scrape_sinks import JsonlSink
+from crawl_frontier import CrawlFrontier, extract_title_id
+from http_transport import HTTPTransport
+
+def keeps_movie(movie: Dict, keep_filter: Dict) -> bool:
+    """
+    Check a scraped movie against a crawl's keep filter
+
+    Args:
+        movie: Movie details
+        keep_filter: {'min_rating': float} and/or {'genre': str}; an empty
+            filter keeps every movie
+    """
+    min_rating = keep_filter.get('min_rating')
+    if min_rating is not None and (movie.get('imdb_rating') or 0) < min_rating:
+        return False
+    genre = keep_filter.get('genre')
+    if genre is not None and genre.lower() not in [g.lower() for g in movie.get('genres', [])]:
+        return False
+    return True
 
 class IMDBScraper:
-    def __init__(self):
+    def __init__(self, max_workers: int = 4, requests_per_second: float = 1.0, max_per_host: int = 4,
+                 cache: Optional[ResponseCache] = None, frontier: Optional[CrawlFrontier] = None,
+                 transport: Optional[HTTPTransport] = None):
+        """
+        Args:
+            max_workers: Number of detail pages fetched concurrently
+            requests_per_second: Global request rate shared by all workers
+            max_per_host: Maximum in-flight requests to a single host
+            cache: Optional persistent response cache shared across runs
+            frontier: Optional persistent crawl frontier; titles fetched
+                recently (by IMDB tt ID) are skipped on later runs
+            transport: Optional HTTPTransport; by default one is created with
+                a connection pool sized for max_workers
+        """
         self.base_url = "https://www.imdb.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.session = requests.Session()
+        self.transport = transport or HTTPTransport(pool_size=max(max_workers, 10))
+        self.session = self.transport.session
         self.session.headers.update(self.headers)
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.host_limiter = HostConcurrencyLimiter(max_per_host)
+        self.cache = cache
+        self.frontier = frontier
+    
+    def _get(self, url: str, headers: Optional[Dict] = None) -> requests.Response:
+        """Issue a GET request through the per-host cap; every attempt takes a rate-limiter token"""
+        with self.host_limiter.limit(url):
+            return self.transport.get(url, headers=headers, before_attempt=self.rate_limiter.acquire)
+    
+    def latency_report(self) -> Dict:
+        """Get the per-request latency histogram and retry count, for sizing concurrency"""
+        report = self.transport.latency.summary()
+        report['retries'] = self.transport.retries
+        return report
+    
+    def _fetch(self, url: str) -> bytes:
+        """
+        Get a page body, using the response cache when one is configured
+        
+        Fresh cache entries are returned without a request; stale ones are
+        revalidated with their ETag/Last-Modified validators.
+        """
+        if self.cache is None:
+            response = self._get(url)
+            response.raise_for_status()
+            return response.content
+        
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry):
+            self.cache.record('hits')
+            return entry.body
+        
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        
+        response = self._get(url, headers=headers or None)
+        if entry and response.status_code == 304:
+            self.cache.touch(url)
+            self.cache.record('revalidated')
+            return entry.body
+        
+        response.raise_for_status()
+        self.cache.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        self.cache.record('misses')
+        return response.content
+    
+    def get_movie_details_batch(self, movie_urls: List[str]) -> List[Optional[Dict]]:
+        """
+        Get details for many movies concurrently
+        
+        Pages are fetched by a bounded worker pool; the shared rate limiter
+        keeps total throughput polite while network latency overlaps.
+        
+        Args:
+            movie_urls: URLs of the movie pages
+            
+        Returns:
+            Movie details (or None on error) in the same order as movie_urls
+        """
+        return list(self.iter_movie_details(movie_urls))
+    
+    def iter_movie_details(self, movie_urls: Iterable[str]) -> Iterator[Optional[Dict]]:
+        """
+        Yield details for many movies, in order, as the worker pool fetches them
+        
+        Stopping the iteration early cancels the pages not yet requested.
+        """
+        if self.max_workers <= 1:
+            for url in movie_urls:
+                yield self.get_movie_details(url)
+            return
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            yield from executor.map(self.get_movie_details, movie_urls)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _collect_movies(self, movie_urls: List[str], keep_filter: Dict,
+                        sink=None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Fetch movie details and keep the ones accepted by keep_filter
+        
+        Without a sink, kept movies are returned as a list. With a sink, URLs
+        already in the sink are skipped and each kept movie is appended to the
+        sink as soon as it is scraped instead of being held in memory. With a
+        frontier, the filter and limit are stored with the crawl so resume()
+        applies them too, and titles left over once the limit is reached are
+        marked dropped.
+        """
+        if sink is not None:
+            done = sink.written_keys()
+            movie_urls = [url for url in movie_urls if url not in done]
+        crawl_id = None
+        if self.frontier is not None:
+            crawl_id = self.frontier.start_crawl(keep_filter, limit)
+            movie_urls = self._schedule(movie_urls, crawl_id)
+        
+        movies = []
+        kept = 0
+        processed = 0
+        details = self.iter_movie_details(movie_urls)
+        try:
+            for url, movie_details in zip(movie_urls, details):
+                processed += 1
+                keep = bool(movie_details) and keeps_movie(movie_details, keep_filter)
+                if keep:
+                    if sink is not None:
+                        sink.write(movie_details)
+                    else:
+                        movies.append(movie_details)
+                # Checkpoint only after the movie was written
+                if self.frontier is not None:
+                    if movie_details:
+                        self.frontier.mark_done(url, kept=keep)
+                    else:
+                        self.frontier.mark_failed(url)
+                if keep:
+                    kept += 1
+                    if limit is not None and kept >= limit:
+                        break
+        finally:
+            # Cancels the pages not yet requested
+            details.close()
+        if self.frontier is not None:
+            self.frontier.mark_dropped(movie_urls[processed:])
+        return movies
     
     def search_movies(self, query: str, max_results: int = 10) -> List[Dict]:
         """
@@ -35,10 +203,7 @@ class IMDBScraper:
             # IMDB search URL
             search_url = f"{self.base_url}/find?q={query.replace(' ', '+')}&s=tt&ttype=ft"
             
-            response = self.session.get(search_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(self._fetch(search_url), 'html.parser')
             
             # Find movie results
             movie_results = []
@@ -75,6 +240,9 @@ class IMDBScraper:
         """
         Get detailed information about a specific movie
         
+        Details come from the page's embedded JSON-LD block when present,
+        otherwise from a tree built only over the needed page sections.
+        
         Args:
             movie_url: URL of the movie page
             
@@ -82,90 +250,106 @@ class IMDBScraper:
             Dictionary with movie details or None if error
         """
         try:
-            response = self.session.get(movie_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract movie title
-            title = soup.find('h1', {'data-testid': 'hero-title-block__title'})
-            title = title.get_text(strip=True) if title else "Unknown"
-            
-            # Extract year
-            year_element = soup.find('span', {'data-testid': 'hero-title-block__metadata'})
-            year = None
-            if year_element:
-                year_text = year_element.get_text()
-                year_match = re.search(r'(\d{4})', year_text)
-                year = year_match.group(1) if year_match else None
-            
-            # Extract rating
-            rating_element = soup.find('span', {'data-testid': 'hero-rating-bar__aggregate-rating__score'})
-            rating = None
-            if rating_element:
-                rating_text = rating_element.get_text()
-                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                rating = float(rating_match.group(1)) if rating_match else None
-            
-            # Extract genres
-            genres = []
-            genre_elements = soup.find_all('a', {'data-testid': 'genres'})
-            for genre_elem in genre_elements:
-                genre_text = genre_elem.get_text(strip=True)
-                if genre_text:
-                    genres.append(genre_text)
-            
-            # Extract director
-            director = "Unknown"
-            director_section = soup.find('section', {'data-testid': 'title-details-section'})
-            if director_section:
-                director_elem = director_section.find('a', href=re.compile(r'/name/nm\d+'))
-                if director_elem:
-                    director = director_elem.get_text(strip=True)
-            
-            # Extract cast
-            cast = []
-            cast_section = soup.find('section', {'data-testid': 'title-cast'})
-            if cast_section:
-                cast_elements = cast_section.find_all('a', href=re.compile(r'/name/nm\d+'))
-                for cast_elem in cast_elements[:5]:  # Top 5 cast members
-                    cast_name = cast_elem.get_text(strip=True)
-                    if cast_name and cast_name not in cast:
-                        cast.append(cast_name)
-            
-            # Extract plot summary
-            plot = "No plot available"
-            plot_element = soup.find('span', {'data-testid': 'plot-summary'})
-            if plot_element:
-                plot = plot_element.get_text(strip=True)
-            
-            movie_details = {
-                'title': title,
-                'year': year,
-                'imdb_rating': rating,
-                'genres': genres,
-                'director': director,
-                'cast': cast,
-                'plot': plot,
-                'url': movie_url
-            }
-            
-            return movie_details
-            
+            return parse_movie_page(self._fetch(movie_url), movie_url)
         except Exception as e:
             print(f"Error getting movie details: {e}")
             return None
     
-    def get_top_movies(self, category: str = "top", min_rating: float = 7.0) -> List[Dict]:
+    def _schedule(self, movie_urls: List[str], crawl_id: Optional[int] = None) -> List[str]:
+        """
+        Register URLs with the frontier and keep only titles that need fetching
+        
+        Duplicate titles (same tt ID) are dropped and earlier URLs get higher
+        priority, so an interrupted crawl resumes in the original order.
+        """
+        scheduled = []
+        seen = set()
+        for rank, url in enumerate(movie_urls):
+            title_id = extract_title_id(url)
+            if title_id in seen:
+                continue
+            seen.add(title_id)
+            if self.frontier.add(url, priority=len(movie_urls) - rank, crawl_id=crawl_id):
+                scheduled.append(url)
+        return scheduled
+    
+    def resume(self, sink=None, batch_size: int = 50) -> List[Dict]:
+        """
+        Fetch the titles left pending in the frontier by an interrupted crawl
+        
+        Each title is kept according to the filter and limit of the crawl
+        that queued it, so the result matches an uninterrupted run.
+        
+        Args:
+            sink: Optional JsonlSink/ParquetSink to stream movies to
+            batch_size: Number of pending titles taken from the frontier at a time
+            
+        Returns:
+            List of kept movies (empty when streaming to a sink)
+        """
+        if self.frontier is None:
+            raise ValueError("resume() requires a crawl frontier")
+        movies = []
+        crawls = {}
+        while True:
+            batch = self.frontier.next_batch(batch_size)
+            if not batch:
+                return movies
+            for _, _, crawl_id in batch:
+                if crawl_id not in crawls:
+                    crawls[crawl_id] = list(self.frontier.get_crawl(crawl_id))
+            
+            # Titles of crawls that already kept their limit are not fetched
+            dropped = [url for _, url, crawl_id in batch if self._crawl_full(crawls[crawl_id])]
+            self.frontier.mark_dropped(dropped)
+            pending = [(url, crawl_id) for _, url, crawl_id in batch if not self._crawl_full(crawls[crawl_id])]
+            
+            details = self.iter_movie_details([url for url, _ in pending])
+            processed = 0
+            try:
+                for (url, crawl_id), movie_details in zip(pending, details):
+                    processed += 1
+                    if not movie_details:
+                        self.frontier.mark_failed(url)
+                        continue
+                    crawl = crawls[crawl_id]
+                    if self._crawl_full(crawl):
+                        self.frontier.mark_dropped([url])
+                        continue
+                    keep = keeps_movie(movie_details, crawl[0])
+                    if keep:
+                        if sink is not None:
+                            sink.write(movie_details)
+                        else:
+                            movies.append(movie_details)
+                        crawl[2] += 1
+                    self.frontier.mark_done(url, kept=keep)
+                    # Stop fetching once every crawl left in the batch is full
+                    if keep and self._crawl_full(crawl) and all(
+                            self._crawl_full(crawls[other]) for _, other in pending[processed:]):
+                        break
+            finally:
+                details.close()
+            self.frontier.mark_dropped([url for url, _ in pending[processed:]])
+    
+    @staticmethod
+    def _crawl_full(crawl) -> bool:
+        """Check whether a (keep_filter, limit, kept) crawl reached its limit"""
+        _, limit, kept = crawl
+        return limit is not None and kept >= limit
+    
+    def get_top_movies(self, category: str = "top", min_rating: float = 7.0, sink=None) -> List[Dict]:
         """
         Get top-rated movies from IMDB
         
         Args:
             category: Category to search (top, popular, etc.)
             min_rating: Minimum IMDB rating
+            sink: Optional JsonlSink/ParquetSink; movies are streamed to it as
+                they are scraped and titles already in it are skipped
             
         Returns:
-            List of top movies
+            List of top movies (empty when streaming to a sink)
         """
         try:
             if category == "top":
@@ -175,73 +359,59 @@ class IMDBScraper:
             else:
                 url = f"{self.base_url}/chart/top/"
             
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(self._fetch(url), 'html.parser')
             
-            movies = []
+            movie_urls = []
             movie_elements = soup.find_all('h3', class_='ipc-title__text')
             
             for i, elem in enumerate(movie_elements[:50]):  # Top 50 movies
                 try:
-                    title_text = elem.get_text(strip=True)
-                    # Remove ranking number
-                    title = re.sub(r'^\d+\.\s*', '', title_text)
-                    
                     # Get movie URL
                     movie_link = elem.find_parent('a')
-                    movie_url = self.base_url + movie_link['href'] if movie_link else None
-                    
-                    if movie_url:
-                        # Get detailed info
-                        movie_details = self.get_movie_details(movie_url)
-                        if movie_details and movie_details.get('imdb_rating', 0) >= min_rating:
-                            movies.append(movie_details)
-                        
-                        # Be respectful with requests
-                        time.sleep(1)
+                    if movie_link:
+                        movie_urls.append(self.base_url + movie_link['href'])
                         
                 except Exception as e:
                     print(f"Error processing movie {i}: {e}")
                     continue
             
-            return movies
+            # Get detailed info concurrently; the rate limiter keeps requests polite
+            return self._collect_movies(
+                movie_urls,
+                {'min_rating': min_rating},
+                sink
+            )
             
         except Exception as e:
             print(f"Error getting top movies: {e}")
             return []
     
-    def get_movies_by_genre(self, genre: str, max_results: int = 20) -> List[Dict]:
+    def get_movies_by_genre(self, genre: str, max_results: int = 20, sink=None) -> List[Dict]:
         """
         Get movies by specific genre
         
         Args:
             genre: Genre to search for
             max_results: Maximum number of results
+            sink: Optional JsonlSink/ParquetSink; movies are streamed to it as
+                they are scraped and titles already in it are skipped
             
         Returns:
-            List of movies in the specified genre
+            List of movies in the specified genre (empty when streaming to a sink)
         """
         try:
             # Search for genre-specific movies
             search_query = f"{genre} movies"
             search_results = self.search_movies(search_query, max_results)
             
-            movies = []
-            for result in search_results:
-                if result['url']:
-                    movie_details = self.get_movie_details(result['url'])
-                    if movie_details and genre.lower() in [g.lower() for g in movie_details.get('genres', [])]:
-                        movies.append(movie_details)
-                    
-                    # Be respectful with requests
-                    time.sleep(1)
-                    
-                    if len(movies) >= max_results:
-                        break
+            movie_urls = [result['url'] for result in search_results if result['url']]
             
-            return movies
+            return self._collect_movies(
+                movie_urls,
+                {'genre': genre},
+                sink,
+                limit=max_results
+            )
             
         except Exception as e:
             print(f"Error getting movies by genre: {e}")
@@ -256,6 +426,18 @@ class IMDBScraper:
         except Exception as e:
             print(f"Error saving to CSV: {e}")
     
+    def save_to_jsonl(self, movies: Iterable[Dict], filename: str):
+        """Append movie data to a line-delimited JSON file, one record per line"""
+        try:
+            count = 0
+            with JsonlSink(filename) as sink:
+                for movie in movies:
+                    sink.write(movie)
+                    count += 1
+            print(f"Saved {count} movies to {filename}")
+        except Exception as e:
+            print(f"Error saving to JSONL: {e}")
+    
     def save_to_json(self, movies: List[Dict], filename: str):
         """Save movie data to JSON file"""
         try:
@@ -0,0 +1,341 @@
+"""
+Model Store Module
+Saves fitted recommenders as versioned artifact bundles and memory-maps them back
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from similarity_index import TopKSimilarityIndex
+from ann_index import IVFIndex
+from facet_index import FacetIndex
+from field_tokenizer import MultiValuedField
+from entity_registry import EntityRegistry
+
+# Bump whenever the bundle layout changes; older bundles are rejected on load
+ARTIFACT_VERSION = 7
+
+SIMILARITY_INDEX_TYPES = {
+    'TopKSimilarityIndex': TopKSimilarityIndex,
+    'IVFIndex': IVFIndex
+}
+
+# Sparse matrices stored on the recommender itself
+RECOMMENDER_SPARSE_ATTRIBUTES = ('tfidf_matrix', 'genre_incidence', 'actor_matrix', 'director_matrix')
+
+
+def _save_array(directory, name, array):
+    np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+
+
+def _load_array(directory, name, mmap):
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None)
+
+
+def _save_sparse(directory, name, matrix):
+    """Save a CSR matrix as three plain .npy files so each can be memory-mapped"""
+    matrix = matrix.tocsr()
+    _save_array(directory, f"{name}.data", matrix.data)
+    _save_array(directory, f"{name}.indices", matrix.indices)
+    _save_array(directory, f"{name}.indptr", matrix.indptr)
+    return list(matrix.shape)
+
+
+def _load_sparse(directory, name, shape, mmap):
+    return sparse.csr_matrix(
+        (
+            _load_array(directory, f"{name}.data", mmap),
+            _load_array(directory, f"{name}.indices", mmap),
+            _load_array(directory, f"{name}.indptr", mmap)
+        ),
+        shape=tuple(shape),
+        copy=False
+    )
+
+
+def _save_strings(directory, name, values):
+    """Save strings (None/NaN allowed) as one UTF-8 buffer plus character offsets"""
+    missing = np.array([not isinstance(value, str) for value in values], dtype=bool)
+    texts = ['' if is_missing else value for value, is_missing in zip(values, missing)]
+    _save_array(directory, f"{name}.utf8", np.frombuffer(''.join(texts).encode('utf-8'), dtype=np.uint8))
+    _save_array(directory, f"{name}.offsets", np.concatenate(([0], np.cumsum([len(text) for text in texts]))))
+    _save_array(directory, f"{name}.missing", missing)
+
+
+def _load_strings(directory, name, mmap):
+    """Load strings saved with _save_strings as an object array"""
+    text = _load_array(directory, f"{name}.utf8", mmap).tobytes().decode('utf-8')
+    offsets = _load_array(directory, f"{name}.offsets", mmap).tolist()
+    missing = _load_array(directory, f"{name}.missing", mmap)
+    values = np.array([text[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])] or [], dtype=object)
+    values[missing] = None
+    return values
+
+
+def _save_column(directory, name, column):
+    """
+    Save one catalog column as plain .npy arrays (no pickling)
+
+    Returns:
+        Spec dict stored in the manifest to rebuild the column
+    """
+    dtype = column.dtype
+    spec = {'dtype': str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        _save_array(directory, f"{name}.codes", column.cat.codes.to_numpy())
+        _save_column_values(directory, f"{name}.categories", dtype.categories.to_numpy(dtype=object))
+        spec.update(kind='category', ordered=bool(dtype.ordered), categories_dtype=str(dtype.categories.dtype))
+    elif isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        _save_array(directory, f"{name}.values", column.to_numpy())
+        spec.update(kind='numeric')
+    elif pd.api.types.is_numeric_dtype(dtype):
+        # Nullable extension dtype such as Int32: values plus missing mask
+        _save_array(directory, f"{name}.values", column.to_numpy(dtype=dtype.numpy_dtype, na_value=0))
+        _save_array(directory, f"{name}.missing", column.isna().to_numpy())
+        spec.update(kind='nullable')
+    elif column.map(lambda value: isinstance(value, list)).all() and len(column) > 0:
+        # Lists repeat heavily (e.g. genre combinations), so only the distinct
+        # lists are stored, with each row coded by its list
+        row_codes, rows = pd.factorize(column.map(tuple).to_numpy())
+        codes, values = pd.factorize(np.array([item for items in rows for item in items], dtype=object))
+        _save_array(directory, f"{name}.rows", row_codes)
+        _save_array(directory, f"{name}.offsets", np.concatenate(([0], np.cumsum([len(items) for items in rows]))))
+        _save_array(directory, f"{name}.codes", codes)
+        _save_column_values(directory, f"{name}.values", values)
+        spec.update(kind='list')
+    else:
+        _save_column_values(directory, name, column.to_numpy(dtype=object))
+        spec.update(kind='string')
+    return spec
+
+
+def _save_column_values(directory, name, values):
+    if not all(isinstance(value, str) or pd.isna(value) for value in values):
+        raise ValueError(f"Cannot save column '{name}': values must be strings")
+    _save_strings(directory, name, values)
+
+
+def _load_column(directory, name, spec, mmap):
+    """Rebuild a column saved with _save_column"""
+    kind = spec['kind']
+    if kind == 'category':
+        categories = pd.Index(_load_strings(directory, f"{name}.categories", mmap), dtype=spec['categories_dtype'])
+        return pd.Categorical.from_codes(
+            np.asarray(_load_array(directory, f"{name}.codes", mmap)),
+            dtype=pd.CategoricalDtype(categories, ordered=spec['ordered'])
+        )
+    if kind == 'numeric':
+        return _load_array(directory, f"{name}.values", mmap)
+    if kind == 'nullable':
+        values = pd.array(np.asarray(_load_array(directory, f"{name}.values", mmap)), dtype=spec['dtype'])
+        values[np.asarray(_load_array(directory, f"{name}.missing", mmap))] = pd.NA
+        return values
+    if kind == 'list':
+        items = _load_strings(directory, f"{name}.values", mmap)[_load_array(directory, f"{name}.codes", mmap)].tolist()
+        offsets = _load_array(directory, f"{name}.offsets", mmap).tolist()
+        rows = np.empty(len(offsets) - 1, dtype=object)
+        for position, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            rows[position] = items[start:stop]
+        return rows[_load_array(directory, f"{name}.rows", mmap)]
+    return pd.array(_load_strings(directory, name, mmap), dtype=spec['dtype'])
+
+
+def _save_catalog(directory, catalog):
+    """Save the catalog frame and its index column by column"""
+    columns = {}
+    for position, column in enumerate(catalog.columns):
+        columns[column] = _save_column(directory, f"catalog.{position}", catalog[column])
+    index = _save_column(directory, 'catalog.index', catalog.index.to_series(index=None))
+    return {'columns': columns, 'index': index}
+
+
+def _load_catalog(directory, layout, mmap):
+    index = pd.Index(_load_column(directory, 'catalog.index', layout['index'], mmap))
+    return pd.DataFrame({
+        column: _load_column(directory, f"catalog.{position}", spec, mmap)
+        for position, (column, spec) in enumerate(layout['columns'].items())
+    }, index=index, copy=False)
+
+
+def save_recommender(recommender, path):
+    """
+    Save a fitted EnhancedMovieRecommender to an artifact bundle directory
+
+    The bundle holds a manifest with the recommender's settings, the
+    vocabularies as JSON and every array, including each catalog column, as
+    an individual .npy file; nothing is pickled. It is written to a temporary directory first and moved into
+    place, so readers never see a partial bundle. An existing bundle at path
+    is renamed aside before the new one takes its place and only deleted
+    afterwards; a path holding anything other than a bundle is refused.
+    """
+    index = recommender.similarity_index
+    index_type = type(index).__name__
+    if index_type not in SIMILARITY_INDEX_TYPES:
+        raise ValueError(f"Cannot save similarity backend of type '{index_type}'")
+
+    if os.path.lexists(path) and not os.path.isfile(os.path.join(path, 'manifest.json')):
+        raise ValueError(f"'{path}' exists and is not a model bundle; refusing to replace it")
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.bundle-', dir=parent)
+    try:
+        arrays_dir = os.path.join(staging, 'arrays')
+        os.makedirs(arrays_dir)
+
+        sparse_shapes = {}
+        for name in RECOMMENDER_SPARSE_ATTRIBUTES:
+            sparse_shapes[name] = _save_sparse(arrays_dir, name, getattr(recommender, name))
+        _save_array(arrays_dir, 'tfidf_idf', recommender.tfidf_vectorizer.idf_)
+        for facet_name, facet in recommender.facets.items():
+            for name in facet._array_attributes:
+                _save_array(arrays_dir, f"facet.{facet_name}.{name}", getattr(facet, name))
+        _save_array(arrays_dir, 'actor_names.offsets', recommender.actor_names.offsets)
+        _save_array(arrays_dir, 'actor_names.codes', recommender.actor_names.codes)
+
+        for name in index._array_attributes:
+            _save_array(arrays_dir, f"index.{name}", getattr(index, name))
+        for name in index._sparse_attributes:
+            sparse_shapes[f"index.{name}"] = _save_sparse(arrays_dir, f"index.{name}", getattr(index, name))
+
+        vocabulary = {
+            'tfidf': {term: int(col) for term, col in recommender.tfidf_vectorizer.vocabulary_.items()},
+            'tfidf_params': {
+                'max_features': recommender.tfidf_vectorizer.max_features,
+                'stop_words': recommender.tfidf_vectorizer.stop_words
+            },
+            'genres': list(recommender.genre_vocabulary),
+            'actors': {
+                'names': recommender.actor_registry.names,
+                'keys': recommender.actor_registry.keys
+            },
+            'actor_names': list(recommender.actor_names.vocabulary),
+            'directors': {
+                'names': recommender.director_registry.names,
+                'keys': recommender.director_registry.keys
+            },
+            'facets': {
+                facet_name: [str(value) for value in facet.values]
+                for facet_name, facet in recommender.facets.items()
+            }
+        }
+        with open(os.path.join(staging, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(vocabulary, f, ensure_ascii=False)
+
+        catalog_layout = _save_catalog(arrays_dir, recommender.df)
+
+        manifest = {
+            'artifact_version': ARTIFACT_VERSION,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'n_items': len(recommender.df),
+            'params': {
+                'similarity_top_k': recommender.similarity_top_k,
+                'refit_fraction': recommender.refit_fraction,
+                'n_jobs': recommender.n_jobs,
+                'fuzzy_names': recommender.fuzzy_names
+            },
+            'rows_changed_since_fit': recommender._rows_changed_since_fit,
+            'similarity_index': {
+                'type': index_type,
+                'params': {name: getattr(index, name) for name in index._param_names}
+            },
+            'sparse_shapes': sparse_shapes,
+            'catalog': catalog_layout
+        }
+        with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _swap_bundle(staging, path)
+
+
+def _swap_bundle(staging, path):
+    """Move a finished bundle to path, keeping any previous bundle until the move succeeded"""
+    if not os.path.lexists(path):
+        os.replace(staging, path)
+        return
+    retired = f"{staging}.old"
+    os.replace(path, retired)
+    try:
+        os.replace(staging, path)
+    except OSError:
+        os.replace(retired, path)
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_recommender(recommender_cls, path, data_provider=None, mmap=True):
+    """
+    Load an EnhancedMovieRecommender saved with save_recommender
+
+    With mmap=True every array is memory-mapped read-only, so processes that
+    load the same bundle share its pages and nothing is refitted.
+    """
+    with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('artifact_version') != ARTIFACT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact version {manifest.get('artifact_version')} "
+            f"(expected {ARTIFACT_VERSION}); refit and save the model again"
+        )
+    with open(os.path.join(path, 'vocabulary.json'), encoding='utf-8') as f:
+        vocabulary = json.load(f)
+
+    arrays_dir = os.path.join(path, 'arrays')
+    shapes = manifest['sparse_shapes']
+
+    index_info = manifest['similarity_index']
+    index = SIMILARITY_INDEX_TYPES[index_info['type']](**index_info['params'])
+    for name in index._array_attributes:
+        setattr(index, name, _load_array(arrays_dir, f"index.{name}", mmap))
+    for name in index._sparse_attributes:
+        setattr(index, name, _load_sparse(arrays_dir, f"index.{name}", shapes[f"index.{name}"], mmap))
+
+    recommender = recommender_cls(data_provider, **manifest['params'])
+    recommender._rows_changed_since_fit = manifest['rows_changed_since_fit']
+    recommender.similarity_backend = index
+    recommender.similarity_index = index
+    recommender.df = _load_catalog(arrays_dir, manifest['catalog'], mmap)
+    for name in RECOMMENDER_SPARSE_ATTRIBUTES:
+        setattr(recommender, name, _load_sparse(arrays_dir, name, shapes[name], mmap))
+
+    tfidf_params = vocabulary['tfidf_params']
+    recommender.tfidf_vectorizer = TfidfVectorizer(
+        max_features=tfidf_params['max_features'],
+        stop_words=tfidf_params['stop_words'],
+        vocabulary=vocabulary['tfidf']
+    )
+    recommender.tfidf_vectorizer.idf_ = np.asarray(_load_array(arrays_dir, 'tfidf_idf', mmap))
+
+    recommender.genre_vocabulary = {genre: i for i, genre in enumerate(vocabulary['genres'])}
+    # Keys are saved in ID order, so the registries need no normalizing on load
+    recommender.actor_registry = EntityRegistry.from_keys(**vocabulary['actors'])
+    recommender.director_registry = EntityRegistry.from_keys(**vocabulary['directors'])
+    recommender.actor_names = MultiValuedField(
+        vocabulary['actor_names'],
+        _load_array(arrays_dir, 'actor_names.offsets', mmap),
+        _load_array(arrays_dir, 'actor_names.codes', mmap)
+    )
+    recommender.genre_matrix = pd.DataFrame.sparse.from_spmatrix(
+        recommender.genre_incidence, index=recommender.df.index, columns=vocabulary['genres']
+    )
+    recommender.facets = {}
+    for facet_name, values in vocabulary['facets'].items():
+        facet = FacetIndex(values)
+        for name in facet._array_attributes:
+            setattr(facet, name, _load_array(arrays_dir, f"facet.{facet_name}.{name}", mmap))
+        recommender.facets[facet_name] = facet
+
+    recommender.is_fitted = True
+    return recommender
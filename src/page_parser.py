@@ -0,0 +1,231 @@
+"""
+IMDB Page Parser Module
+Targeted extraction of movie details from IMDB title pages
+"""
+
+import html
+import json
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+JSON_LD_PATTERN = re.compile(
+    rb'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I
+)
+NAME_HREF_PATTERN = re.compile(r'/name/nm\d+')
+
+# The only subtrees get_movie_details reads when JSON-LD is missing
+DETAIL_TEST_IDS = [
+    'hero-title-block__title',
+    'hero-title-block__metadata',
+    'hero-rating-bar__aggregate-rating__score',
+    'genres',
+    'title-details-section',
+    'title-cast',
+    'plot-summary'
+]
+DETAIL_STRAINER = SoupStrainer(attrs={'data-testid': DETAIL_TEST_IDS})
+DETAIL_ELEMENT_PATTERN = re.compile(
+    rb'<([a-zA-Z][a-zA-Z0-9]*)\b[^>]*\bdata-testid=["\'](?:'
+    + b'|'.join(re.escape(test_id.encode()) for test_id in DETAIL_TEST_IDS)
+    + rb')["\'][^>]*>'
+)
+
+MAX_CAST = 5
+
+# JSON-LD @type values describing a title; other blocks (Organization,
+# BreadcrumbList, ...) are skipped
+TITLE_LD_TYPES = frozenset({
+    'Movie', 'TVSeries', 'TVMiniSeries', 'TVEpisode', 'TVMovie', 'TVSpecial', 'ShortFilm'
+})
+
+
+def _names(value) -> List[str]:
+    """Get person names from a JSON-LD person, list of persons or string"""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    names = []
+    for person in value:
+        name = person.get('name') if isinstance(person, dict) else person
+        if isinstance(name, str) and name.strip():
+            names.append(html.unescape(name.strip()))
+    return names
+
+
+def _is_title(data) -> bool:
+    """Check that a JSON-LD object describes a title"""
+    if not isinstance(data, dict) or not data.get('name'):
+        return False
+    types = data.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(ld_type in TITLE_LD_TYPES for ld_type in types)
+
+
+def parse_json_ld(content: bytes, movie_url: str) -> Optional[Dict]:
+    """
+    Extract movie details from the page's embedded JSON-LD block
+
+    Returns:
+        Dictionary with movie details, or None when the page has no usable
+        JSON-LD movie description
+    """
+    for match in JSON_LD_PATTERN.finditer(content):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        # A block may hold one object, a list of objects or an @graph
+        if isinstance(data, dict) and isinstance(data.get('@graph'), list):
+            data = data['@graph']
+        candidates = data if isinstance(data, list) else [data]
+        data = next((candidate for candidate in candidates if _is_title(candidate)), None)
+        if data is None:
+            continue
+
+        year = None
+        year_match = re.search(r'(\d{4})', str(data.get('datePublished', '')))
+        if year_match:
+            year = year_match.group(1)
+
+        rating = None
+        rating_value = (data.get('aggregateRating') or {}).get('ratingValue')
+        if rating_value is not None:
+            try:
+                rating = float(rating_value)
+            except (TypeError, ValueError):
+                rating = None
+
+        genres = data.get('genre') or []
+        if isinstance(genres, str):
+            genres = [genres]
+
+        directors = _names(data.get('director'))
+        cast = []
+        for name in _names(data.get('actor')):
+            if name not in cast:
+                cast.append(name)
+
+        return {
+            'title': html.unescape(data['name']),
+            'year': year,
+            'imdb_rating': rating,
+            'genres': [html.unescape(genre) for genre in genres if genre],
+            'director': directors[0] if directors else "Unknown",
+            'cast': cast[:MAX_CAST],
+            'plot': html.unescape(data.get('description') or "No plot available"),
+            'url': movie_url
+        }
+    return None
+
+
+def _element_end(content: bytes, tag: bytes, start: int) -> int:
+    """Find the end offset of the element whose start tag ends at start"""
+    tag_pattern = re.compile(rb'<(/?)' + re.escape(tag) + rb'\b[^>]*?(/?)>', re.I)
+    depth = 1
+    for match in tag_pattern.finditer(content, start):
+        if match.group(1):
+            depth -= 1
+        elif not match.group(2):
+            depth += 1
+        if depth == 0:
+            return match.end()
+    return len(content)
+
+
+def extract_detail_fragments(content: bytes) -> bytes:
+    """
+    Cut the elements carrying one of DETAIL_TEST_IDS out of the raw page
+
+    A byte-level scan finds each wanted element and its matching end tag, so
+    the HTML parser only ever sees those subtrees instead of the whole page.
+    """
+    fragments = []
+    position = 0
+    while True:
+        match = DETAIL_ELEMENT_PATTERN.search(content, position)
+        if match is None:
+            break
+        end = _element_end(content, match.group(1), match.end())
+        fragments.append(content[match.start():end])
+        position = end
+    return b'\n'.join(fragments)
+
+
+def parse_html(content: bytes, movie_url: str, targeted: bool = True) -> Dict:
+    """
+    Extract movie details from the page markup
+
+    By default only the subtrees carrying one of DETAIL_TEST_IDS are parsed;
+    pass targeted=False to build the full document tree.
+    """
+    if targeted:
+        soup = BeautifulSoup(extract_detail_fragments(content), 'html.parser', parse_only=DETAIL_STRAINER)
+    else:
+        soup = BeautifulSoup(content, 'html.parser')
+
+    # Extract movie title
+    title = soup.find('h1', {'data-testid': 'hero-title-block__title'})
+    title = title.get_text(strip=True) if title else "Unknown"
+
+    # Extract year
+    year_element = soup.find('span', {'data-testid': 'hero-title-block__metadata'})
+    year = None
+    if year_element:
+        year_match = re.search(r'(\d{4})', year_element.get_text())
+        year = year_match.group(1) if year_match else None
+
+    # Extract rating
+    rating_element = soup.find('span', {'data-testid': 'hero-rating-bar__aggregate-rating__score'})
+    rating = None
+    if rating_element:
+        rating_match = re.search(r'(\d+\.?\d*)', rating_element.get_text())
+        rating = float(rating_match.group(1)) if rating_match else None
+
+    # Extract genres
+    genres = []
+    for genre_elem in soup.find_all('a', {'data-testid': 'genres'}):
+        genre_text = genre_elem.get_text(strip=True)
+        if genre_text:
+            genres.append(genre_text)
+
+    # Extract director
+    director = "Unknown"
+    director_section = soup.find('section', {'data-testid': 'title-details-section'})
+    if director_section:
+        director_elem = director_section.find('a', href=NAME_HREF_PATTERN)
+        if director_elem:
+            director = director_elem.get_text(strip=True)
+
+    # Extract cast
+    cast = []
+    cast_section = soup.find('section', {'data-testid': 'title-cast'})
+    if cast_section:
+        for cast_elem in cast_section.find_all('a', href=NAME_HREF_PATTERN)[:MAX_CAST]:
+            cast_name = cast_elem.get_text(strip=True)
+            if cast_name and cast_name not in cast:
+                cast.append(cast_name)
+
+    # Extract plot summary
+    plot = "No plot available"
+    plot_element = soup.find('span', {'data-testid': 'plot-summary'})
+    if plot_element:
+        plot = plot_element.get_text(strip=True)
+
+    return {
+        'title': title,
+        'year': year,
+        'imdb_rating': rating,
+        'genres': genres,
+        'director': director,
+        'cast': cast,
+        'plot': plot,
+        'url': movie_url
+    }
+
+
+def parse_movie_page(content: bytes, movie_url: str) -> Dict:
+    """Extract movie details, preferring JSON-LD and falling back to targeted HTML parsing"""
+    return parse_json_ld(content, movie_url) or parse_html(content, movie_url)
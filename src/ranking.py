@@ -0,0 +1,73 @@
+"""
+Ranking Utilities
+Top-k selection shared by the recommenders and similarity indexes
+"""
+
+import numpy as np
+
+
+def top_k_indices(scores, k):
+    """
+    Get the indices of the k largest scores, best first
+
+    Uses argpartition to find the winners in O(N) and sorts only those k.
+    Ties are broken deterministically in favour of the lower index.
+
+    Args:
+        scores: 1-D array of scores
+        k: number of indices to return
+
+    Returns:
+        Array of at most k indices ordered by descending score
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        winners = np.concatenate((above, ties))
+    else:
+        winners = np.arange(n)
+
+    # Sort the winners by score; lexsort is stable so lower indices win ties
+    return winners[np.lexsort((winners, -scores[winners]))]
+
+
+def top_k_rows(scores, k):
+    """
+    Row-wise top-k selection for a 2-D score matrix
+
+    Args:
+        scores: (rows, n) array of scores
+        k: number of columns to keep per row (at most n)
+
+    Returns:
+        Tuple of (indices, values), both (rows, k), each row ordered by
+        descending score with ties broken in favour of the lower column index
+    """
+    scores = np.asarray(scores)
+    n_rows, n = scores.shape
+    k = max(0, min(k, n))
+    if k == 0 or n_rows == 0:
+        return np.zeros((n_rows, k), dtype=np.intp), np.zeros((n_rows, k), dtype=scores.dtype)
+
+    if k < n:
+        partition = np.argpartition(-scores, k - 1, axis=1)[:, k - 1:k]
+        threshold = np.take_along_axis(scores, partition, axis=1)
+        above = scores > threshold
+        ties = scores == threshold
+        # Keep only as many ties per row as are needed, lowest column first
+        needed = k - above.sum(axis=1, keepdims=True)
+        selected = above | (ties & (np.cumsum(ties, axis=1) <= needed))
+        indices = np.nonzero(selected)[1].reshape(n_rows, k)
+    else:
+        indices = np.broadcast_to(np.arange(n), (n_rows, n)).copy()
+
+    values = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(values, order, axis=1)
@@ -0,0 +1,61 @@
+"""
+Rate Limiting Module
+Thread-safe token bucket and per-host concurrency cap for polite crawling
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Global token-bucket rate limiter shared by all crawl workers
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``;
+    each request takes one token and blocks until one is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until the requested number of tokens is available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostConcurrencyLimiter:
+    """Caps the number of in-flight requests per host"""
+
+    def __init__(self, max_per_host):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def limit(self, url):
+        """Hold one of the host's slots for the duration of the block"""
+        semaphore = self._semaphore(urlparse(url).netloc)
+        with semaphore:
+            yield
@@ -5,27 +5,41 @@ Combines user preferences with IMDB ratings for personalized recommendations
 
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import StandardScaler
-import warnings
-warnings.filterwarnings('ignore')
+
+from similarity_index import TopKSimilarityIndex
+from ranking import top_k_indices
+from facet_index import FacetIndex
 
 class MovieRecommender:
-    def __init__(self, data_processor):
+    def __init__(self, data_processor, similarity_top_k=50):
         self.data_processor = data_processor
+        self.similarity_top_k = similarity_top_k
         self.df_processed = None
         self.genre_features = None
         self.text_features = None
-        self.similarity_matrix = None
+        self.similarity_index = None
+        self.genre_array = None
+        self.genre_norms = None
+        self.genre_facet = None
         
     def fit(self, df):
-        """Process data and build similarity matrix"""
+        """Process data and build the top-K similarity index"""
         self.df_processed, self.genre_features, self.text_features = \
             self.data_processor.process_movie_data(df)
         
-        # Build similarity matrix based on genre features
-        self.similarity_matrix = cosine_similarity(self.genre_features)
+        # Keep genre features as a float CSR matrix for vectorized scoring
+        self.genre_array = self.data_processor.get_feature_array(self.genre_features)
+        self.genre_norms = self.data_processor.get_row_norms(self.genre_array)
+        
+        # Build top-K similarity index based on genre features
+        self.similarity_index = TopKSimilarityIndex(k=self.similarity_top_k).build(self.genre_array)
+        
+        # Genre postings sorted by rating for top-by-genre queries
+        self.genre_facet = FacetIndex.from_incidence(
+            self.genre_features, list(self.data_processor.genre_classes)
+        ).rank_by(self.df_processed['imdb_rating'].values)
         
         return self
     
@@ -49,15 +63,12 @@ class MovieRecommender:
             user_preferences.get('directors', [])
         )
         
-        # Calculate preference scores
-        preference_scores = []
-        for idx in range(len(self.df_processed)):
-            movie_features = self.data_processor.get_movie_features(self.df_processed, idx)
-            preference_score = self.data_processor.calculate_similarity(user_vector, movie_features)
-            preference_scores.append(preference_score)
+        # Calculate preference scores for all movies at once
+        preference_scores = self.data_processor.calculate_similarities(
+            user_vector, self.genre_array, self.genre_norms
+        )
         
         # Normalize preference scores
-        preference_scores = np.array(preference_scores)
         preference_scores = (preference_scores - preference_scores.min()) / (preference_scores.max() - preference_scores.min() + 1e-8)
         
         # Normalize IMDB ratings (0-10 scale to 0-1)
@@ -68,7 +79,7 @@ class MovieRecommender:
                           preference_weight * preference_scores)
         
         # Get top recommendations
-        top_indices = np.argsort(combined_scores)[::-1][:top_n]
+        top_indices = top_k_indices(combined_scores, top_n)
         
         recommendations = []
         for idx in top_indices:
@@ -119,28 +130,25 @@ class MovieRecommender:
         if self.df_processed is None:
             raise ValueError("Model not fitted. Call fit() first.")
         
-        # Find movie index
-        movie_idx = self.df_processed[self.df_processed['title'] == movie_title].index
+        # Find movie position
+        movie_idx = np.flatnonzero(self.df_processed['title'].values == movie_title)
         if len(movie_idx) == 0:
             raise ValueError(f"Movie '{movie_title}' not found in dataset")
         
         movie_idx = movie_idx[0]
         
-        # Get similarity scores for this movie
-        movie_similarities = self.similarity_matrix[movie_idx]
-        
-        # Get top similar movies (excluding the movie itself)
-        similar_indices = np.argsort(movie_similarities)[::-1][1:top_n+1]
+        # Get top similar movies (the index never contains the movie itself)
+        similar_indices, similar_scores = self.similarity_index.query(movie_idx, top_n)
         
         similar_movies = []
-        for idx in similar_indices:
+        for idx, score in zip(similar_indices, similar_scores):
             movie = self.df_processed.iloc[idx]
             similar_movies.append({
                 'title': movie['title'],
                 'year': movie['year'],
                 'genres': movie['genres_clean'],
                 'imdb_rating': movie['imdb_rating'],
-                'similarity_score': movie_similarities[idx]
+                'similarity_score': float(score)
             })
         
         return similar_movies
@@ -150,18 +158,12 @@ class MovieRecommender:
         if self.df_processed is None:
             raise ValueError("Model not fitted. Call fit() first.")
         
-        # Filter movies by genre and minimum rating
-        genre_mask = self.df_processed[genre] == 1
-        rating_mask = self.df_processed['imdb_rating'] >= min_rating
-        
-        filtered_movies = self.df_processed[genre_mask & rating_mask]
+        # Highest-rated movies of the genre at or above the minimum rating
+        top_movies = self.df_processed.iloc[self.genre_facet.top(genre, top_n, min_rating)]
         
-        if len(filtered_movies) == 0:
+        if len(top_movies) == 0:
             return []
         
-        # Sort by IMDB rating
-        top_movies = filtered_movies.nlargest(top_n, 'imdb_rating')
-        
         recommendations = []
         for _, movie in top_movies.iterrows():
             recommendations.append({
@@ -185,20 +187,22 @@ class MovieRecommender:
         preferred_genres = user_preferences.get('genres', [])
         
         # Analyze genre distribution in dataset
-        genre_counts = self.genre_features.sum().sort_values(ascending=False)
+        genre_counts = pd.Series(
+            np.asarray(self.genre_features.sum(axis=0)).ravel(), index=self.data_processor.genre_classes
+        ).sort_values(ascending=False)
         
         # Find underrepresented genres
-        available_genres = set(self.genre_features.columns)
+        available_genres = set(self.data_processor.genre_classes)
         user_genres = set(preferred_genres)
         underrepresented = available_genres - user_genres
         
         # Get average ratings for preferred genres
         genre_ratings = {}
         for genre in preferred_genres:
-            if genre in self.genre_features.columns:
-                genre_movies = self.df_processed[self.genre_features[genre] == 1]
+            if genre in self.data_processor.genre_columns:
+                genre_movies = self.genre_facet.postings(genre)
                 if len(genre_movies) > 0:
-                    genre_ratings[genre] = genre_movies['imdb_rating'].mean()
+                    genre_ratings[genre] = self.df_processed['imdb_rating'].values[genre_movies].mean()
         
         analysis = {
             'preferred_genres': preferred_genres,
@@ -0,0 +1,148 @@
+"""
+Scrape Sink Module
+Incremental, crash-safe writers that append scraped records as they arrive
+"""
+
+import glob
+import json
+import os
+from typing import Dict, Set
+
+
+class JsonlSink:
+    """Appends one JSON record per line and fsyncs every ``fsync_every`` records
+
+    Reopening an existing file resumes it: a partially written last line left
+    by a crash is truncated away and the keys already written are available
+    from written_keys(). A corrupt line anywhere before the last one is not a
+    torn write, so it raises ValueError instead of discarding the records
+    after it.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 50, key: str = 'url'):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.key = key
+        self._keys = set()
+        self._pending = 0
+        self._recover()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _recover(self):
+        """Drop a torn trailing line and collect the keys of complete records"""
+        if not os.path.exists(self.path):
+            return
+        valid_size = 0
+        torn = None
+        with open(self.path, 'rb') as f:
+            for line_number, line in enumerate(f, start=1):
+                if torn is not None:
+                    raise ValueError(f"{self.path}: corrupt record on line {torn}")
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("unterminated line")
+                    record = json.loads(line)
+                except ValueError:
+                    # Only acceptable as the last line, where a crash can tear a write
+                    torn = line_number
+                    continue
+                valid_size += len(line)
+                if isinstance(record, dict) and record.get(self.key) is not None:
+                    self._keys.add(record[self.key])
+        if torn is not None:
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def written_keys(self) -> Set:
+        """Get the keys of all records already in the sink"""
+        return set(self._keys)
+
+    def write(self, record: Dict):
+        """Append one record"""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        if record.get(self.key) is not None:
+            self._keys.add(record[self.key])
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Force everything written so far to disk"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.checkpoint()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetSink:
+    """Writes records as row-group-sized Parquet part files in a directory
+
+    Each batch of ``row_group_size`` records becomes one part file, written to
+    a temporary name, fsynced and renamed, so a crash loses at most the
+    records still buffered. Requires pyarrow.
+    """
+
+    def __init__(self, directory: str, row_group_size: int = 1000, key: str = 'url'):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetSink requires pyarrow: pip install pyarrow")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.key = key
+        self._buffer = []
+        self._keys = set()
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, '*.tmp')):
+            os.remove(stale)
+        self._parts = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+        for part in self._parts:
+            self._keys.update(self._pq.read_table(part, columns=[key]).column(key).to_pylist())
+
+    def written_keys(self) -> Set:
+        """Get the keys of all records already in the sink, including buffered ones"""
+        return set(self._keys)
+
+    def write(self, record: Dict):
+        """Buffer one record, flushing a part file when the row group is full"""
+        self._buffer.append(record)
+        if record.get(self.key) is not None:
+            self._keys.add(record[self.key])
+        if len(self._buffer) >= self.row_group_size:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write buffered records as a new part file"""
+        if not self._buffer:
+            return
+        path = os.path.join(self.directory, f"part-{len(self._parts):05d}.parquet")
+        tmp_path = path + '.tmp'
+        self._pq.write_table(self._pa.Table.from_pylist(self._buffer), tmp_path)
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._parts.append(path)
+        self._buffer = []
+
+    def close(self):
+        self.checkpoint()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
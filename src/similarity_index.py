@@ -0,0 +1,236 @@
+"""
+Similarity Index Module
+Stores only the top-K most similar items per movie instead of a dense N x N matrix
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from ranking import top_k_rows
+
+# Shared-memory views attached once per worker process
+_worker_state = {}
+
+
+def _neighbour_block(matrix, matrix_t, start, stop, k):
+    """Get the top-k neighbours of rows start:stop, never the row itself"""
+    block = (matrix[start:stop] @ matrix_t).toarray()
+    rows = np.arange(stop - start)
+    block[rows, rows + start] = -np.inf
+    return top_k_rows(block, k)
+
+
+def _share_array(array, segments):
+    """Copy an array into a new shared memory segment and describe it for workers"""
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(segment)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return segment.name, array.shape, array.dtype.str
+
+
+def _attach_array(spec, segments):
+    name, shape, dtype = spec
+    segment = shared_memory.SharedMemory(name=name)
+    segments.append(segment)
+    return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def _init_worker(matrix_specs, matrix_t_specs, output_specs, shape, k):
+    segments = []
+    matrix = sparse.csr_matrix(tuple(_attach_array(spec, segments) for spec in matrix_specs), shape=shape)
+    matrix_t = sparse.csc_matrix(
+        tuple(_attach_array(spec, segments) for spec in matrix_t_specs), shape=(shape[1], shape[0])
+    )
+    indices, scores = (_attach_array(spec, segments) for spec in output_specs)
+    _worker_state.update(
+        matrix=matrix, matrix_t=matrix_t, indices=indices, scores=scores, k=k, segments=segments
+    )
+
+
+def _build_block_in_worker(start, stop):
+    state = _worker_state
+    state['indices'][start:stop], state['scores'][start:stop] = _neighbour_block(
+        state['matrix'], state['matrix_t'], start, stop, state['k']
+    )
+
+
+class TopKSimilarityIndex:
+    """Cosine similarity index keeping the K best neighbours of every item
+
+    Neighbours are kept in two parallel (N, K) arrays, ``indices`` and
+    ``scores``, ordered best first. The index is built in row blocks so peak
+    memory is bounded by ``block_elements`` similarity values rather than N².
+    With ``n_jobs`` > 1 the blocks are spread over a process pool that reads
+    the features from, and writes neighbours to, shared memory; the block
+    budget is split between the workers so the ceiling stays the same.
+    """
+
+    # Attributes persisted by model_store
+    _param_names = ('k', 'block_elements', 'n_jobs')
+    _array_attributes = ('indices', 'scores')
+    _sparse_attributes = ()
+
+    def __init__(self, k=50, block_elements=2 ** 24, n_jobs=1):
+        """
+        Args:
+            k: Neighbours kept per item
+            block_elements: Similarity values materialized at once
+            n_jobs: Worker processes for build(); -1 uses every CPU
+        """
+        self.k = k
+        self.block_elements = block_elements
+        self.n_jobs = n_jobs
+        self.indices = None
+        self.scores = None
+
+    @staticmethod
+    def _normalized(features):
+        """Get the L2-normalised rows of a dense or sparse feature matrix as CSR"""
+        if sparse.issparse(features):
+            matrix = features.tocsr().astype(np.float64)
+        else:
+            matrix = sparse.csr_matrix(np.asarray(features, dtype=np.float64))
+        return normalize(matrix)
+
+    def build(self, features):
+        """Build the index from a dense or sparse feature matrix (one row per item)"""
+        matrix = self._normalized(features)
+        matrix_t = matrix.T.tocsc()
+
+        n_items = matrix.shape[0]
+        k = max(0, min(self.k, n_items - 1))
+        self.indices = np.zeros((n_items, k), dtype=np.int32)
+        self.scores = np.zeros((n_items, k), dtype=np.float32)
+        if k == 0:
+            return self
+
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs == -1 else max(1, self.n_jobs)
+        block_size = max(1, self.block_elements // n_jobs // max(n_items, 1))
+        blocks = [(start, min(start + block_size, n_items)) for start in range(0, n_items, block_size)]
+        if n_jobs > 1 and len(blocks) > 1:
+            self._build_parallel(matrix, matrix_t, blocks, k, min(n_jobs, len(blocks)))
+        else:
+            for start, stop in blocks:
+                self.indices[start:stop], self.scores[start:stop] = \
+                    _neighbour_block(matrix, matrix_t, start, stop, k)
+
+        return self
+
+    def _build_parallel(self, matrix, matrix_t, blocks, k, n_jobs):
+        """Fill the neighbour arrays block by block in a pool of worker processes"""
+        segments = []
+        try:
+            matrix_specs = [_share_array(array, segments) for array in (matrix.data, matrix.indices, matrix.indptr)]
+            matrix_t_specs = [
+                _share_array(array, segments) for array in (matrix_t.data, matrix_t.indices, matrix_t.indptr)
+            ]
+            output_specs = [_share_array(self.indices, segments), _share_array(self.scores, segments)]
+            with ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_worker,
+                initargs=(matrix_specs, matrix_t_specs, output_specs, matrix.shape, k)
+            ) as executor:
+                starts, stops = zip(*blocks)
+                list(executor.map(_build_block_in_worker, starts, stops))
+
+            # Copy the results out before the segments are released
+            indices_segment, scores_segment = segments[-2:]
+            self.indices = np.ndarray(self.indices.shape, dtype=self.indices.dtype, buffer=indices_segment.buf).copy()
+            self.scores = np.ndarray(self.scores.shape, dtype=self.scores.dtype, buffer=scores_segment.buf).copy()
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def update(self, features, changed_rows):
+        """
+        Bring the index up to date after items were added or changed
+
+        Rows of features beyond the indexed items are new. New and changed
+        items, and items whose neighbour list held a changed item, are
+        recomputed exactly; every other item only merges the changed items
+        into its current list. This costs O((changed + affected) x N)
+        instead of the O(N²) of a rebuild.
+
+        Args:
+            features: Feature matrix of all items, indexed ones first
+            changed_rows: Positions of indexed items whose features changed
+
+        Returns:
+            self
+        """
+        if self.indices is None:
+            raise ValueError("Index not built. Call build() first.")
+        matrix = self._normalized(features)
+        n_items, n_indexed = matrix.shape[0], len(self.indices)
+        changed = np.union1d(np.asarray(changed_rows, dtype=np.int64), np.arange(n_indexed, n_items))
+
+        k = max(0, min(self.k, n_items - 1))
+        indices = np.zeros((n_items, k), dtype=np.int32)
+        scores = np.zeros((n_items, k), dtype=np.float32)
+        if k == 0:
+            self.indices, self.scores = indices, scores
+            return self
+
+        stale = np.zeros(n_items, dtype=bool)
+        stale[changed] = True
+        stale[:n_indexed] |= np.isin(self.indices, changed[changed < n_indexed]).any(axis=1)
+
+        # Exact neighbours for new, changed and affected items
+        matrix_t = matrix.T.tocsc()
+        recompute = np.flatnonzero(stale)
+        block_size = max(1, self.block_elements // max(n_items, 1))
+        for start in range(0, len(recompute), block_size):
+            rows = recompute[start:start + block_size]
+            block = (matrix[rows] @ matrix_t).toarray()
+            block[np.arange(len(rows)), rows] = -np.inf
+            indices[rows], scores[rows] = top_k_rows(block, k)
+
+        # Everyone else keeps their list and considers the changed items
+        keep = np.flatnonzero(~stale)
+        changed_t = matrix[changed].T.tocsc()
+        width = self.indices.shape[1] + len(changed)
+        block_size = max(1, self.block_elements // width)
+        for start in range(0, len(keep), block_size):
+            rows = keep[start:start + block_size]
+            candidates = np.hstack([self.indices[rows], np.broadcast_to(changed, (len(rows), len(changed)))])
+            candidate_scores = np.hstack([
+                self.scores[rows], (matrix[rows] @ changed_t).toarray().astype(np.float32)
+            ])
+            # Order candidates by item so ties resolve as in build()
+            order = np.argsort(candidates, axis=1, kind='stable')
+            candidates = np.take_along_axis(candidates, order, axis=1)
+            top, scores[rows] = top_k_rows(np.take_along_axis(candidate_scores, order, axis=1), k)
+            indices[rows] = np.take_along_axis(candidates, top, axis=1)
+
+        self.indices, self.scores = indices, scores
+        return self
+
+    def query(self, item_idx, top_n=5):
+        """Get (indices, scores) of the top_n neighbours of an item, best first
+
+        At most k neighbours are kept per item, so asking for more than k
+        returns only k of them (with a warning); rebuild with a larger k to
+        get more.
+        """
+        if self.indices is None:
+            raise ValueError("Index not built. Call build() first.")
+        kept = self.indices.shape[1]
+        if top_n > kept and kept < self.indices.shape[0] - 1:
+            warnings.warn(
+                f"top_n={top_n} exceeds the {kept} neighbours kept per item; returning {kept}",
+                stacklevel=2
+            )
+        return self.indices[item_idx, :top_n], self.scores[item_idx, :top_n]
+
+    @property
+    def nbytes(self):
+        """Memory used by the neighbour arrays in bytes"""
+        if self.indices is None:
+            return 0
+        return self.indices.nbytes + self.scores.nbytes
@@ -6,6 +6,9 @@ Tests basic functionality to ensure no import errors
 
 import sys
 import os
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 def test_imports():
     """Test if all modules can be imported successfully"""
@@ -70,6 +73,587 @@ def test_basic_functionality():
         print(f"❌ Functionality test failed: {e}")
         return False
 
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Serves one fixed movie page with an ETag and counts requests"""
+    body = b'<h1 data-testid="hero-title-block__title">Inception</h1>'
+    requests_seen = []
+    
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+    
+    def log_message(self, *args):
+        pass
+
+def test_response_cache_revalidation():
+    """Test that the scraper cache serves fresh pages and revalidates stale ones"""
+    print("\n🧪 Testing response cache...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from imdb_scraper import IMDBScraper
+    from http_cache import ResponseCache
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/title/tt1375666/"
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(os.path.join(tmp, 'cache.sqlite'), ttl=3600)
+            scraper = IMDBScraper(requests_per_second=100, cache=cache)
+            
+            assert scraper.get_movie_details(url)['title'] == 'Inception'
+            assert scraper.get_movie_details(url)['title'] == 'Inception'
+            assert _FixtureHandler.requests_seen == [None]
+            
+            # Expire the entry: the next fetch must revalidate and get a 304
+            cache.ttl = 0
+            assert scraper.get_movie_details(url)['title'] == 'Inception'
+            assert _FixtureHandler.requests_seen == [None, '"v1"']
+            assert cache.stats == {'hits': 1, 'revalidated': 1, 'misses': 1}
+            cache.close()
+    finally:
+        server.shutdown()
+    
+    print("✅ Response cache served and revalidated pages correctly")
+    return True
+
+def test_facet_top_with_float32_ratings():
+    """Test that a float32 rating equal to min_rating passes the threshold"""
+    print("\n🧪 Testing rating thresholds on float32 ratings...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import numpy as np
+    from facet_index import FacetIndex
+    
+    ratings = np.array([7.7, 8.1, 7.6, 7.7], dtype=np.float32)
+    facet = FacetIndex.from_codes(np.array([0, 0, 0, 1]), ['Drama', 'Crime']).rank_by(ratings)
+    
+    assert facet.top('Drama', 5, min_score=7.7).tolist() == [1, 0]
+    assert facet.top('Crime', 5, min_score=7.7).tolist() == [3]
+    assert facet.top('Drama', 5, min_score=7.71).tolist() == [1]
+    
+    print("✅ Ratings equal to the threshold are kept")
+    return True
+
+def test_entity_registry_resolution():
+    """Test that unknown names resolve to nothing unless fuzzy matching is asked for"""
+    print("\n🧪 Testing entity name resolution...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from entity_registry import EntityRegistry
+    
+    registry = EntityRegistry(['Álex Pina', 'Leonardo DiCaprio', 'Leonardo Nam'])
+    
+    assert registry.resolve('  alex   PINA ') == 0
+    assert registry.resolve('Alex Pinto') is None
+    assert registry.resolve('dicap') is None
+    assert registry.resolve('Leonardo') is None
+    assert registry.resolve('dicap', fuzzy=True) == 1
+    assert registry.resolve('Leonardo', fuzzy=True) is None
+    assert registry.resolve_all(['Leonardo Nam', 'Unknown Person']).tolist() == [2]
+    
+    print("✅ Names resolved exactly; unknown names matched no one")
+    return True
+
+def test_crawl_resume_after_crash():
+    """Test that a resumed crawl keeps what an uninterrupted one would and stops at its limit"""
+    print("\n🧪 Testing crawl resume...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from imdb_scraper import IMDBScraper
+    from crawl_frontier import CrawlFrontier
+    from scrape_sinks import JsonlSink
+    
+    urls = [f"https://www.imdb.com/title/tt{i}/" for i in range(1, 8)]
+    ratings = {urls[0]: 8.0, urls[1]: 6.0, urls[2]: 7.5}
+    fetched = []
+    crash_at = [urls[2]]
+    
+    def fake_details(url):
+        if url in crash_at:
+            crash_at.remove(url)
+            raise KeyboardInterrupt
+        fetched.append(url)
+        return {'url': url, 'title': url, 'imdb_rating': ratings.get(url, 9.0), 'genres': []}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        frontier = CrawlFrontier(os.path.join(tmp, 'frontier.sqlite'))
+        scraper = IMDBScraper(max_workers=1, frontier=frontier)
+        scraper.get_movie_details = fake_details
+        
+        with JsonlSink(os.path.join(tmp, 'movies.jsonl')) as sink:
+            try:
+                scraper._collect_movies(urls, {'min_rating': 7.0}, sink, limit=2)
+                assert False, "the crawl should have crashed"
+            except KeyboardInterrupt:
+                pass
+        assert fetched == urls[:2]
+        
+        del fetched[:]
+        with JsonlSink(os.path.join(tmp, 'movies.jsonl')) as sink:
+            assert scraper.resume(sink) == []
+            assert sink.written_keys() == {urls[0], urls[2]}
+        assert fetched == [urls[2]]
+        assert frontier.pending_count() == 0
+        frontier.close()
+    
+    print("✅ Resume fetched only the titles the crawl still needed")
+    return True
+
+def test_fit_reuses_loader_encodings():
+    """Test that fitting on a loaded catalog reuses the loader's tokenized fields"""
+    print("\n🧪 Testing field encoding reuse...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from enhanced_data import EnhancedDataProvider
+    from enhanced_recommendation import EnhancedMovieRecommender
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.csv')
+        EnhancedDataProvider().get_all_data().to_csv(path, index=False)
+        provider = EnhancedDataProvider(path)
+        reused = EnhancedMovieRecommender(provider).fit()
+        retokenized = EnhancedMovieRecommender(provider).fit(EnhancedDataProvider(path).get_all_data())
+    
+    assert reused.actor_names is provider.field_encodings['actors']
+    assert retokenized.actor_names is not provider.field_encodings['actors']
+    assert (reused.genre_incidence != retokenized.genre_incidence).nnz == 0
+    assert (reused.actor_matrix != retokenized.actor_matrix).nnz == 0
+    preferences = {'genres': ['Drama'], 'actors': ['Tom Hanks'], 'directors': ['Christopher Nolan']}
+    assert ([movie['title'] for movie in reused.get_recommendations(preferences, 5)] ==
+            [movie['title'] for movie in retokenized.get_recommendations(preferences, 5)])
+    
+    print("✅ Fit reused the loader's encodings")
+    return True
+
+def test_model_bundle_round_trip():
+    """Test that a saved model loads with its settings and recommends and updates like the original"""
+    print("\n🧪 Testing model bundle save/load...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from enhanced_data import EnhancedDataProvider
+    from enhanced_recommendation import EnhancedMovieRecommender
+    
+    catalog = EnhancedDataProvider().get_all_data()
+    original = EnhancedMovieRecommender(None, similarity_top_k=10, refit_fraction=0.5, fuzzy_names=True)
+    original.fit(catalog.iloc[:-2].copy())
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model')
+        original.save(path)
+        loaded = EnhancedMovieRecommender.load(path)
+        
+        assert (loaded.similarity_top_k, loaded.refit_fraction, loaded.fuzzy_names) == (10, 0.5, True)
+        preferences = {'genres': ['Drama'], 'actors': ['hanks'], 'min_rating': 8.0}
+        assert loaded.get_recommendations(preferences, 5) == original.get_recommendations(preferences, 5)
+        assert loaded.get_similar_movies('Inception', 3) == original.get_similar_movies('Inception', 3)
+        
+        # Incremental updates work on the memory-mapped model
+        update = catalog.iloc[-2:].astype(object)
+        loaded.partial_fit(update)
+        original.partial_fit(update)
+        assert loaded._rows_changed_since_fit == original._rows_changed_since_fit == 2
+        title = update['title'].iloc[0]
+        assert loaded.get_similar_movies(title, 3) == original.get_similar_movies(title, 3)
+        assert loaded.get_recommendations(preferences, 5) == original.get_recommendations(preferences, 5)
+        del loaded
+    
+    print("✅ Loaded model matched the saved one")
+    return True
+
+def test_batch_recommendations_match_single():
+    """Test that batch recommendations equal per-user recommendations across chunk boundaries"""
+    print("\n🧪 Testing batch recommendations...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from enhanced_data import EnhancedDataProvider
+    from enhanced_recommendation import EnhancedMovieRecommender
+    
+    recommender = EnhancedMovieRecommender(EnhancedDataProvider()).fit()
+    users = [
+        {},
+        {'genres': ['Drama']},
+        {'genres': ['Action', 'Sci-Fi'], 'content_type': 'movie'},
+        {'actors': ['Tom Hanks'], 'directors': ['Christopher Nolan']},
+        {'language': 'Hindi', 'genres': ['Comedy']},
+        {'content_type': 'web_series', 'language': 'Hindi'},
+        {'language': 'Klingon'},
+        {'genres': [], 'actors': [], 'directors': []}
+    ]
+    
+    def summary(recommendations):
+        return [(movie['title'], round(movie['similarity_score'], 9)) for movie in recommendations]
+    
+    expected = [summary(recommender.get_recommendations(user, top_n=4)) for user in users]
+    for chunk_size in (None, 1, 3):
+        batch = recommender.get_recommendations_batch(users, top_n=4, chunk_size=chunk_size)
+        assert [summary(recommendations) for recommendations in batch] == expected, chunk_size
+    
+    print("✅ Batch recommendations matched per-user recommendations")
+    return True
+
+def test_partial_fit_matches_refit():
+    """Test that partial_fit upserts give the same results as a full refit and fall back to one"""
+    print("\n🧪 Testing incremental catalog updates...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import numpy as np
+    import pandas as pd
+    from enhanced_data import EnhancedDataProvider
+    from enhanced_recommendation import EnhancedMovieRecommender
+    from similarity_index import TopKSimilarityIndex
+    
+    full = EnhancedDataProvider().get_all_data().astype({'genre': object, 'language': object, 'actors': object})
+    base = full.iloc[:-4].reset_index(drop=True)
+    new = full.iloc[-4:].copy()
+    new.loc[new.index[0], 'language'] = 'Tamil'
+    new.loc[new.index[1], 'genre'] = 'Drama,Mystery'
+    update = full.iloc[[2]].copy()
+    update['imdb_rating'] = 5.5
+    update['actors'] = 'Jane Doe,Tom Hanks'
+    expected = pd.concat([base, new], ignore_index=True)
+    expected.iloc[2] = update.iloc[0]
+    
+    incremental = EnhancedMovieRecommender(None, similarity_top_k=10, refit_fraction=0.5).fit(base.copy())
+    idf = incremental.tfidf_vectorizer.idf_.copy()
+    incremental.partial_fit(pd.concat([new, update]))
+    refitted = EnhancedMovieRecommender(None, similarity_top_k=10).fit(expected.copy())
+    
+    # Updated in place, new titles appended, TF-IDF vocabulary frozen
+    assert incremental.df['title'].tolist() == expected['title'].tolist()
+    assert incremental.df['imdb_rating'].tolist() == expected['imdb_rating'].tolist()
+    assert incremental._rows_changed_since_fit == 5
+    assert np.array_equal(incremental.tfidf_vectorizer.idf_, idf)
+    
+    def titles(recommendations):
+        return [(movie['title'], round(movie['similarity_score'], 9)) for movie in recommendations]
+    
+    for preferences in ({'actors': ['Jane Doe']}, {'genres': ['Mystery']}, {'language': 'Tamil'},
+                        {'genres': ['Drama'], 'actors': ['Tom Hanks'], 'content_type': 'movie'}):
+        assert titles(incremental.get_recommendations(preferences, 5)) == \
+            titles(refitted.get_recommendations(preferences, 5)), preferences
+    
+    # Neighbours match an index rebuilt from the updated TF-IDF rows
+    rebuilt = TopKSimilarityIndex(k=10).build(incremental.tfidf_matrix)
+    for position in range(len(expected)):
+        got_indices, got_scores = incremental.similarity_index.query(position, 10)
+        want_indices, want_scores = rebuilt.query(position, 10)
+        assert np.array_equal(got_indices, want_indices) and np.allclose(got_scores, want_scores)
+    
+    # Changing more than refit_fraction of the catalog refits from scratch
+    changes = full.iloc[:8].assign(imdb_rating=9.0)
+    incremental.partial_fit(changes)
+    assert incremental._rows_changed_since_fit == 0
+    expected.iloc[:8] = changes
+    refitted = EnhancedMovieRecommender(None, similarity_top_k=10).fit(expected.copy())
+    assert (incremental.tfidf_matrix != refitted.tfidf_matrix).nnz == 0
+    for position in range(len(expected)):
+        assert np.array_equal(incremental.similarity_index.query(position, 10)[0],
+                              refitted.similarity_index.query(position, 10)[0])
+    
+    print("✅ Incremental updates matched a full refit")
+    return True
+
+def test_top_k_query_warns_beyond_k():
+    """Test that asking the top-K index for more than k neighbours warns the caller"""
+    print("\n🧪 Testing top-K query warning...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import importlib
+    import warnings
+    import numpy as np
+    import recommendation
+    from similarity_index import TopKSimilarityIndex
+    
+    index = TopKSimilarityIndex(k=2).build(np.random.default_rng(0).random((6, 4)))
+    with warnings.catch_warnings(record=True) as caught:
+        # Importing the recommenders must not silence it
+        importlib.reload(recommendation)
+        indices, _ = index.query(0, top_n=4)
+    
+    assert len(indices) == 2
+    assert any("top_n=4 exceeds the 2 neighbours" in str(warning.message) for warning in caught)
+    
+    print("✅ Asking for more than k neighbours warned")
+    return True
+
+def test_recommendations_with_missing_ratings():
+    """Test that titles without a rating neither poison the scores nor outrank rated ones"""
+    print("\n🧪 Testing recommendations with missing ratings...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import numpy as np
+    from enhanced_data import EnhancedDataProvider
+    from enhanced_recommendation import EnhancedMovieRecommender, UNRATED_SCORE
+    
+    catalog = EnhancedDataProvider().get_all_data().copy()
+    catalog.loc[[0, 5], 'imdb_rating'] = np.nan
+    recommender = EnhancedMovieRecommender(None).fit(catalog)
+    
+    preferences = {'genres': ['Drama']}
+    single = recommender.get_recommendations(preferences, top_n=len(catalog))
+    batch = recommender.get_recommendations_batch([preferences], top_n=len(catalog))[0]
+    scores = [movie['similarity_score'] for movie in single]
+    
+    assert np.isfinite(scores).all()
+    assert scores[0] == 1.0
+    assert [movie['title'] for movie in batch] == [movie['title'] for movie in single]
+    assert np.allclose([movie['similarity_score'] for movie in batch], scores)
+    by_rating = recommender.get_recommendations(preferences, len(catalog), rating_weight=1.0, preference_weight=0.0)
+    unrated = [movie['similarity_score'] for movie in by_rating if np.isnan(movie['imdb_rating'])]
+    assert unrated == [UNRATED_SCORE, UNRATED_SCORE]
+    
+    print("✅ Missing ratings scored explicitly")
+    return True
+
+def _failing_neighbour_block(matrix, matrix_t, start, stop, k):
+    raise RuntimeError("worker failed")
+
+def test_parallel_similarity_build():
+    """Test that the parallel top-K build matches the serial one and frees shared memory on failure"""
+    print("\n🧪 Testing parallel similarity index build...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import multiprocessing
+    import numpy as np
+    from multiprocessing import shared_memory
+    from scipy import sparse
+    import similarity_index
+    from similarity_index import TopKSimilarityIndex
+    
+    features = sparse.random(60, 30, density=0.2, format='csr', random_state=0)
+    serial = TopKSimilarityIndex(k=5, block_elements=240).build(features)
+    parallel = TopKSimilarityIndex(k=5, block_elements=240, n_jobs=2).build(features)
+    assert np.array_equal(parallel.indices, serial.indices)
+    assert np.array_equal(parallel.scores, serial.scores)
+    
+    # A failing worker must not leak the shared memory segments (workers
+    # only see the patched block function when forked)
+    if multiprocessing.get_start_method() == 'fork':
+        segment_names = []
+        share_array = similarity_index._share_array
+        def recording_share_array(array, segments):
+            spec = share_array(array, segments)
+            segment_names.append(spec[0])
+            return spec
+        neighbour_block = similarity_index._neighbour_block
+        similarity_index._share_array = recording_share_array
+        similarity_index._neighbour_block = _failing_neighbour_block
+        try:
+            TopKSimilarityIndex(k=5, block_elements=240, n_jobs=2).build(features)
+            assert False, "the build should have failed"
+        except RuntimeError:
+            pass
+        finally:
+            similarity_index._share_array = share_array
+            similarity_index._neighbour_block = neighbour_block
+        assert len(segment_names) == 8
+        for name in segment_names:
+            try:
+                shared_memory.SharedMemory(name=name).close()
+                assert False, f"segment {name} was not unlinked"
+            except FileNotFoundError:
+                pass
+    
+    print("✅ Parallel build matched the serial build")
+    return True
+
+def test_top_k_tie_breaking():
+    """Test that top-k selection is deterministic: best first, lower index wins ties"""
+    print("\n🧪 Testing top-k selection...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import numpy as np
+    from ranking import top_k_indices, top_k_rows
+    
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5, -np.inf, 0.5])
+    assert top_k_indices(scores, 1).tolist() == [1]
+    assert top_k_indices(scores, 3).tolist() == [1, 4, 0]
+    assert top_k_indices(scores, 4).tolist() == [1, 4, 0, 2]
+    assert top_k_indices(scores, 8).tolist() == [1, 4, 0, 2, 5, 7, 3, 6]
+    assert top_k_indices(scores, 20).tolist() == [1, 4, 0, 2, 5, 7, 3, 6]
+    assert top_k_indices(scores, 0).tolist() == []
+    assert top_k_indices(np.array([]), 3).tolist() == []
+    
+    # Every row matches a stable sort by descending score, for every k
+    rows = np.random.default_rng(0).integers(0, 4, size=(50, 12)).astype(np.float64)
+    expected = np.argsort(-rows, axis=1, kind='stable')
+    for k in range(0, 15):
+        indices, values = top_k_rows(rows, k)
+        width = min(k, rows.shape[1])
+        assert indices.shape == values.shape == (50, width)
+        assert np.array_equal(indices, expected[:, :width])
+        assert np.array_equal(values, np.take_along_axis(rows, expected[:, :width], axis=1))
+        for row, row_indices in zip(rows, indices):
+            assert np.array_equal(top_k_indices(row, k), row_indices)
+    assert top_k_rows(np.zeros((0, 5)), 3)[0].shape == (0, 3)
+    
+    print("✅ Top-k selection broke ties by index")
+    return True
+
+def test_scrape_sinks_recovery():
+    """Test that sinks append, resume their keys, and only drop a torn last line"""
+    print("\n🧪 Testing scrape sinks...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    from scrape_sinks import JsonlSink, ParquetSink
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'movies.jsonl')
+        with JsonlSink(path, fsync_every=1) as sink:
+            sink.write({'url': 'u1', 'title': 'A'})
+            sink.write({'url': 'u2', 'title': 'B'})
+        with JsonlSink(path) as sink:
+            assert sink.written_keys() == {'u1', 'u2'}
+            sink.write({'url': 'u3', 'title': 'C'})
+        
+        # A crash mid-write leaves a torn last line, which is dropped
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"url": "u4", "ti')
+        with JsonlSink(path) as sink:
+            assert sink.written_keys() == {'u1', 'u2', 'u3'}
+            sink.write({'url': 'u4', 'title': 'D'})
+        with open(path, encoding='utf-8') as f:
+            assert [line.count('"url"') for line in f] == [1, 1, 1, 1]
+        
+        # Corruption before the last line is reported, not truncated away
+        with open(path, encoding='utf-8') as f:
+            lines = f.readlines()
+        lines[1] = '{"url": "u2", broken\n'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        size = os.path.getsize(path)
+        try:
+            JsonlSink(path)
+            assert False, "a corrupt middle line should raise"
+        except ValueError as e:
+            assert 'line 2' in str(e)
+        assert os.path.getsize(path) == size
+        
+        try:
+            import pyarrow
+        except ImportError:
+            print("⏭️  pyarrow not installed; skipping ParquetSink")
+        else:
+            directory = os.path.join(tmp, 'parquet')
+            with ParquetSink(directory, row_group_size=2) as sink:
+                for i in range(3):
+                    sink.write({'url': f"u{i}", 'title': str(i)})
+            assert ParquetSink(directory).written_keys() == {'u0', 'u1', 'u2'}
+    
+    print("✅ Sinks resumed and recovered correctly")
+    return True
+
+class _StubSession:
+    """Stands in for requests.Session, replaying scripted outcomes per URL"""
+    
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+        self._lock = threading.Lock()
+    
+    def get(self, url, headers=None, timeout=None):
+        import io
+        import requests
+        with self._lock:
+            self.calls.append(url)
+            outcome = self.outcomes[url].pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, response_headers = outcome
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(response_headers)
+        response.raw = io.BytesIO(b'')
+        return response
+
+def test_http_transport_retries():
+    """Test retries, Retry-After handling and thread-safe counters of the HTTP transport"""
+    print("\n🧪 Testing HTTP transport retries...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+    from http_transport import HTTPTransport
+    
+    transport = HTTPTransport(max_retries=2, backoff_base=0.0)
+    transport.session = _StubSession({
+        'ok': [(503, {'Retry-After': '0'}), requests.ConnectionError(), (200, {})],
+        'down': [(503, {}), (502, {}), (503, {})],
+        'dead': [requests.Timeout(), requests.Timeout(), requests.Timeout()]
+    })
+    attempts = []
+    
+    assert transport.get('ok', before_attempt=lambda: attempts.append(1)).status_code == 200
+    assert len(attempts) == 3 and transport.retries == 2
+    assert transport.get('down').status_code == 503
+    assert transport.retries == 4
+    try:
+        transport.get('dead')
+        assert False, "the last timeout should be raised"
+    except requests.Timeout:
+        pass
+    assert transport.retries == 6
+    assert transport.latency.summary()['count'] == 9
+    
+    # Counters stay exact when many threads retry at once
+    urls = [f"url{i}" for i in range(200)]
+    transport = HTTPTransport(max_retries=1, backoff_base=0.0)
+    transport.session = _StubSession({url: [(429, {}), (200, {})] for url in urls})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(lambda url: transport.get(url).status_code, urls))
+    assert statuses == [200] * len(urls)
+    assert transport.retries == len(urls)
+    assert transport.latency.summary()['count'] == 2 * len(urls)
+    
+    print("✅ Transport retried transient failures and counted them")
+    return True
+
+def test_user_preference_matrix():
+    """Test that the batch preference matrix matches the per-user preference vectors"""
+    print("\n🧪 Testing user preference matrix...")
+    
+    src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+    sys.path.insert(0, src_path)
+    import numpy as np
+    from data_processing import MovieDataProcessor
+    
+    processor = MovieDataProcessor()
+    processor.fit(processor.load_sample_data())
+    users = [['Drama'], [], ['Crime', 'Sci-Fi', 'Crime'], ['Western'], ['Action', 'Unknown', 'Thriller']]
+    
+    matrix = processor.create_user_preference_matrix(users)
+    expected = np.array([processor.create_user_preference_vector(genres, [], []) for genres in users])
+    assert matrix.shape == expected.shape
+    assert np.array_equal(matrix.toarray(), expected)
+    assert processor.create_user_preference_matrix([]).shape == (0, len(processor.genre_classes))
+    
+    print("✅ Preference matrix matched the per-user vectors")
+    return True
+
 def main():
     print("🎬 Movie Recommendation System - System Test")
     print("=" * 50)
@@ -84,6 +668,81 @@ def main():
         print("\n❌ Functionality tests failed. Please check your installation.")
         return False
     
+    # Test response cache
+    if not test_response_cache_revalidation():
+        print("\n❌ Response cache tests failed.")
+        return False
+    
+    # Test rating thresholds
+    if not test_facet_top_with_float32_ratings():
+        print("\n❌ Rating threshold tests failed.")
+        return False
+    
+    # Test entity name resolution
+    if not test_entity_registry_resolution():
+        print("\n❌ Entity resolution tests failed.")
+        return False
+    
+    # Test crawl resume
+    if not test_crawl_resume_after_crash():
+        print("\n❌ Crawl resume tests failed.")
+        return False
+    
+    # Test field encoding reuse
+    if not test_fit_reuses_loader_encodings():
+        print("\n❌ Field encoding reuse tests failed.")
+        return False
+    
+    # Test model bundles
+    if not test_model_bundle_round_trip():
+        print("\n❌ Model bundle tests failed.")
+        return False
+    
+    # Test batch recommendations
+    if not test_batch_recommendations_match_single():
+        print("\n❌ Batch recommendation tests failed.")
+        return False
+    
+    # Test incremental updates
+    if not test_partial_fit_matches_refit():
+        print("\n❌ Incremental update tests failed.")
+        return False
+    
+    # Test top-K query warning
+    if not test_top_k_query_warns_beyond_k():
+        print("\n❌ Top-K query warning tests failed.")
+        return False
+    
+    # Test missing ratings
+    if not test_recommendations_with_missing_ratings():
+        print("\n❌ Missing rating tests failed.")
+        return False
+    
+    # Test parallel similarity build
+    if not test_parallel_similarity_build():
+        print("\n❌ Parallel similarity build tests failed.")
+        return False
+    
+    # Test top-k selection
+    if not test_top_k_tie_breaking():
+        print("\n❌ Top-k selection tests failed.")
+        return False
+    
+    # Test scrape sinks
+    if not test_scrape_sinks_recovery():
+        print("\n❌ Scrape sink tests failed.")
+        return False
+    
+    # Test HTTP transport retries
+    if not test_http_transport_retries():
+        print("\n❌ HTTP transport tests failed.")
+        return False
+    
+    # Test user preference matrix
+    if not test_user_preference_matrix():
+        print("\n❌ User preference matrix tests failed.")
+        return False
+    
     print("\n🎉 All tests passed! The system is working correctly.")
     print("\nYou can now:")
     print("  • Run the demo: python demo.py")